@@ -0,0 +1,109 @@
+#!/usr/bin/env python2.6
+'''Solves many independent matching jobs on a pool of worker processes
+
+A manifest lists one job per line: a customer file and a product file
+separated by whitespace (or by a tab, when the paths contain spaces).
+Blank lines and lines starting with # are skipped, and relative paths are
+taken relative to the manifest.  The worker processes are started once and
+reused for every job.  Results are yielded as each job finishes rather than
+in manifest order, so one slow job does not hold back the others.
+
+Usage:
+    jobs = read_manifest(path)
+    for (index, pairs, suitability, seconds, error) in solve_batch(jobs, "jv"):
+        ...
+
+Created on Oct 18, 2026
+'''
+
+import os
+import time
+from multiprocessing import Pool
+
+import loader
+import runners
+
+# Every mode of runners.RUNNERS, as for main.py
+MODES = runners.MODES
+
+def read_manifest(path):
+    """Returns the list of (customer_file, product_file) jobs in the manifest"""
+    base = os.path.dirname(path)
+    jobs = []
+
+    for number, line in enumerate(loader.iter_names(path)):
+        if '\t' in line:
+            fields = [field.strip() for field in line.split('\t') if field.strip()]
+        else:
+            fields = line.split()
+
+        if not fields or fields[0].startswith('#'):
+            continue
+        if len(fields) != 2:
+            raise ValueError("%s line %d: expected a customer file and a product file"
+                             % (path, number + 1))
+
+        jobs.append(tuple(os.path.join(base, field) for field in fields))
+
+    return jobs
+
+def solve_batch(jobs, mode = "imperative", processes = None):
+    """Solves each (customer_file, product_file) job on a pool of processes
+
+    Args:
+        jobs: list of (customer_file, product_file) pairs
+        mode: one of MODES, as for main.py
+        processes: number of workers (defaults to the number of CPUs)
+
+    Yields the result of solve_job for each job as soon as it finishes
+    """
+    if mode not in MODES:
+        raise ValueError("unknown mode " + repr(mode))
+
+    pool = Pool(processes)
+    try:
+        tasks = [(index, customer_file, product_file, mode)
+                 for index, (customer_file, product_file) in enumerate(jobs)]
+
+        # chunksize 1 hands out one job at a time, so results stream back
+        for result in pool.imap_unordered(solve_job, tasks, 1):
+            yield result
+
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+def solve_job(task):
+    """Solves a single (index, customer_file, product_file, mode) task
+
+    Returns [index, pairs, suitability, seconds, error].  error is None unless
+    the job failed, in which case it holds the message and pairs and
+    suitability are None
+    """
+    (index, customer_file, product_file, mode) = task
+
+    start = time.time()
+    try:
+        (pairs, suitability) = solve_files(customer_file, product_file, mode)
+        error = None
+    except Exception, exception:
+        (pairs, suitability) = (None, None)
+        error = "%s: %s" % (exception.__class__.__name__, exception)
+
+    return [index, pairs, suitability, time.time() - start, error]
+
+def solve_files(customer_file, product_file, mode):
+    """Returns [pairs, suitability] for one pair of files"""
+    if mode == "classes":
+        # Only the name features are read for the solve
+        return runners.run_class_features(loader.read_features(customer_file),
+                                          loader.read_features(product_file)[0])
+
+    return solve_names(loader.read_names(customer_file), loader.read_names(product_file), mode)
+
+def solve_names(customer_names, product_names, mode):
+    """Returns [pairs, suitability] for lists of customer and product names"""
+    return runners.RUNNERS[mode](customer_names, product_names)[:2]
@@ -0,0 +1,148 @@
+#!/usr/bin/env python2.6
+'''Looks up which branch of the suitability rules a pair of name lengths takes
+
+A suitability score only depends on the two names through their lengths:
+whether the product length is odd, and whether the two lengths share a
+factor.  This module answers both at once with a table indexed by the
+customer and product lengths, holding
+
+    bit 0: the product length is odd
+    bit 1: the lengths have a common factor greater than 1
+
+so EVEN, ODD, EVEN_COMMON and ODD_COMMON index a customer's four possible
+scores directly.  The common factors come from a sieve of primes rather
+than a gcd or set intersection per pair.  The table starts at 64 lengths
+and grows (at least doubling) whenever a longer name is looked up, but
+never past MAX_SIZE: the table is quadratic in its size and name lengths
+come from the input, so pairs with a longer length are worked out with a
+gcd instead.
+
+There are two views of the table, which only differ for empty names:
+branch_row follows names.Name, where a length of 0 has no factors, and
+gcd_branch_row follows fractions.gcd as milo_functional does, where
+gcd(0, n) = n.
+
+Usage:
+    length_table.ensure(longest_length)
+    branches = length_table.branch_row(customer_length)
+    score = scores[branches[product_length]] # for product_length < table size
+    scores_by_product = length_table.branch_values(scores, customer_length, product_lengths)
+
+Created on Oct 18, 2026
+'''
+
+import threading
+from fractions import gcd
+from operator import or_
+
+EVEN        = 0
+ODD         = 1
+EVEN_COMMON = 2
+ODD_COMMON  = 3
+
+INITIAL_SIZE = 64
+
+# Largest table built, in lengths per side
+MAX_SIZE = 512
+
+# Turns a row of 0/1 common factor flags into the common bit
+_COMMON_BIT = "".join(chr(2 * (value == 1)) for value in range(256))
+
+# (size, branch rows, gcd branch rows), replaced as a whole when it grows
+_table = (0, [], [])
+_lock = threading.Lock()
+
+def ensure(length):
+    """Grow the table to cover every length up to length, or up to MAX_SIZE"""
+    if length >= _table[0] and _table[0] < MAX_SIZE:
+        with _lock:
+            if length >= _table[0] and _table[0] < MAX_SIZE:
+                _build(min(max(length + 1, 2 * _table[0], INITIAL_SIZE), MAX_SIZE))
+
+def branch_row(length):
+    """Returns the branches of length against each product length, as names.Name
+
+    The row only covers the product lengths inside the table, after ensuring them
+    """
+    ensure(length)
+    if length < _table[0]:
+        return _table[1][length]
+    return bytearray(direct_branch(length, product_length) for product_length in range(_table[0]))
+
+def gcd_branch_row(length):
+    """Returns the branches of length against each product length, as fractions.gcd"""
+    ensure(length)
+    if length < _table[0]:
+        return _table[2][length]
+    return bytearray(direct_gcd_branch(length, product_length) for product_length in range(_table[0]))
+
+def branch(length, product_length):
+    ensure(max(length, product_length))
+    if length < _table[0] and product_length < _table[0]:
+        return _table[1][length][product_length]
+    return direct_branch(length, product_length)
+
+def gcd_branch(length, product_length):
+    ensure(max(length, product_length))
+    if length < _table[0] and product_length < _table[0]:
+        return _table[2][length][product_length]
+    return direct_gcd_branch(length, product_length)
+
+def branch_values(values, length, product_lengths, by_gcd = False):
+    """Returns values[branch] of length against each of product_lengths
+
+    Rows of the table are used while every product length is inside it
+    """
+    row = (gcd_branch_row if by_gcd else branch_row)(length)
+    by_length = [values[index] for index in row]
+    try:
+        return map(by_length.__getitem__, product_lengths)
+    except IndexError:
+        find = gcd_branch if by_gcd else branch
+        return [values[find(length, product_length)] for product_length in product_lengths]
+
+def direct_branch(length, product_length):
+    """Works out branch without the table, as names.Name"""
+    common = length > 0 and product_length > 0 and gcd(length, product_length) > 1
+    return product_length % 2 | (EVEN_COMMON if common else EVEN)
+
+def direct_gcd_branch(length, product_length):
+    """Works out gcd_branch without the table, as fractions.gcd"""
+    return product_length % 2 | (EVEN_COMMON if gcd(length, product_length) > 1 else EVEN)
+
+def common_factor(length1, length2):
+    """Matches names.Name.has_common_factor for two name lengths"""
+    return branch(length1, length2) >= EVEN_COMMON
+
+###############################################
+# SIEVE
+###############################################
+
+def _build(size):
+    # common[i][j] is 1 when some prime divides both i and j, 0 included
+    common = [bytearray(size) for i in range(size)]
+    composite = bytearray(size)
+    for prime in range(2, size):
+        if composite[prime]:
+            continue
+        composite[prime * prime::prime] = "\x01" * len(range(prime * prime, size, prime))
+
+        multiples = range(0, size, prime)
+        marks = "\x01" * len(multiples)
+        for i in multiples:
+            common[i][::prime] = marks
+
+    # gcd(0, 0) is 0
+    common[0][0] = 0
+
+    parity = bytearray(length % 2 for length in range(size))
+    gcd_rows = [bytearray(map(or_, parity, row.translate(_COMMON_BIT))) for row in common]
+
+    # An empty name has no factors in names.Name
+    rows = [bytearray(row) for row in gcd_rows]
+    rows[0] = bytearray(parity)
+    for row in rows:
+        row[0] = EVEN
+
+    global _table
+    _table = (size, rows, gcd_rows)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python2.6
+'''Streams customer and product names from files
+
+Files are memory mapped and split into names lazily, so a large input is
+never held in memory as a whole, a CR-stripped copy and a list at once.
+Lines are returned exactly as open(path).read().replace("\r","").split('\n')
+would return them: carriage returns are dropped anywhere in the line and a
+trailing newline yields a final empty name.
+
+Usage:
+    iter_names(path) yields the names one at a time
+    read_names(path) returns them as a list
+    read_features(path) returns the per-name features without keeping the names
+    select_names(path, indices) returns only the names at the given indices
+
+Created on Oct 18, 2026
+'''
+
+import mmap
+import os
+from array import array
+
+from milo_imperative import features
+
+def iter_names(path):
+    """Yields each name (line) in the file"""
+    handle = open(path, 'rb')
+    try:
+        if os.fstat(handle.fileno()).st_size == 0:
+            # An empty file cannot be mapped, it holds a single empty name
+            yield ''
+            return
+
+        data = mmap.mmap(handle.fileno(), 0, access = mmap.ACCESS_READ)
+        try:
+            start = 0
+            while True:
+                end = data.find('\n', start)
+                if end == -1:
+                    yield data[start:].replace('\r', '')
+                    return
+
+                yield data[start:end].replace('\r', '')
+                start = end + 1
+        finally:
+            data.close()
+    finally:
+        handle.close()
+
+def read_names(path):
+    """Returns the list of names in the file"""
+    return list(iter_names(path))
+
+def read_features(path):
+    """Returns [lengths, vowels, consonants] arrays for the names in the file
+
+    The features are computed in the same pass that reads the names, so the
+    names themselves are never kept
+    """
+    lengths = array('l')
+    vowels = array('l')
+    consonants = array('l')
+
+    for name in iter_names(path):
+        (length, vowel_count, consonant_count) = features.name_features(name)
+        lengths.append(length)
+        vowels.append(vowel_count)
+        consonants.append(consonant_count)
+
+    return [lengths, vowels, consonants]
+
+def select_names(path, indices):
+    """Returns a dict of index => name for the wanted indices only"""
+    wanted = set(indices)
+    return dict((index, name) for index, name in enumerate(iter_names(path))
+                if index in wanted)
@@ -4,60 +4,189 @@ Created on May 2, 2010
 @author: Andrew Metcalf
 '''
 import sys
+import time
+from itertools import izip
 
 print sys.argv[0]
 sys.path.append(sys.argv[0])
 
-from milo_imperative import product_matcher as imperative_matcher
-from milo_functional import product_matcher as functional_matcher
+from milo_imperative import stats as matcher_stats
+from runners import RUNNERS, run_imperative, run_functional, run_class_features
+import loader
+import batch
+import server
 
 def print_help():
-    print "python main.py [mode] <customer_file> <products_file>"
+    print "python main.py [--stats] [--memory-limit=<MB>] [--mapped] [mode] <customer_file> <products_file>"
+    print "python main.py batch <manifest_file> [mode]"
+    print "python main.py serve [port] [mode]"
     print ""
     print "Modes (defaults to imperative):"
     print "    functional    Run using the functional version of the program"
     print "    imperative    Run using the imperative version of the program"
+    print "    jv            Run using the shortest augmenting path (Jonker-Volgenant) engine"
+    print "    classes       Solve on score-equivalence classes of names (fastest for large runs)"
+    print "    sparse        Approximate on each customer's top candidate products only"
+    print "                  (usually within 1% of the best suitability)"
+    print "    auction       Solve with the auction algorithm (parallel with NumPy)"
+    print "    rectangular   Solve the customers x products matrix without square padding"
+    print "    implicit      Solve as rectangular, computing costs from name features"
+    print "                  instead of storing the matrix"
+    print "    greedy        Approximate quickly (greedy pass and 2-opt swaps), also"
+    print "                  printing an upper bound on the best suitability"
+    print ""
+    print "--stats prints the calls and time of each step of the imperative engine,"
+    print "its matrix scans and augmenting path lengths"
+    print ""
+    print "--memory-limit stops the imperative engine before it allocates a matrix"
+    print "larger than the given number of megabytes"
+    print ""
+    print "--mapped keeps the imperative engine's matrix in a memory-mapped temporary"
+    print "file, for runs larger than memory; --stats then reports its block size,"
+    print "block reads and page faults"
+    print ""
+    print "--stats, --memory-limit and --mapped only apply to a single imperative run"
+    print ""
+    print "batch solves every customer/product file pair listed in the manifest (one"
+    print "pair per line) on a pool of worker processes, printing each result as it"
+    print "finishes"
+    print ""
+    print "serve answers POST /match requests of JSON customer and product lists on"
+    print "127.0.0.1 (port 8080 by default), solving them on worker processes that"
+    print "stay warm between requests; GET /metrics reports latency and throughput"
     print ""
     print "Example: python main.py imperative cust prod"
 
-def run_imperative(customer_names, product_names):
-    matcher = imperative_matcher.ProductMatcher(customer_names, product_names)
-    pairs = matcher.match_products()
-    suitability = matcher.match_suitability(pairs)
+def run_batch(manifest_file, mode):
+    jobs = batch.read_manifest(manifest_file)
     
-    return [pairs, suitability]
+    start = time.time()
+    for (index, pairs, suitability, seconds, error) in batch.solve_batch(jobs, mode):
+        (customer_file, product_file) = jobs[index]
+        if(error is None):
+            print "%d\t%s\t%s\t%s\t%.3fs" % (index, customer_file, product_file, suitability, seconds)
+        else:
+            print "%d\t%s\t%s\tfailed: %s" % (index, customer_file, product_file, error)
     
-def run_functional(customer_names, product_names):
-    return functional_matcher.matched_solution(customer_names, product_names)
+    print ""
+    print "Solved %d jobs in %.3fs" % (len(jobs), time.time() - start)
+
+def print_matrix_notice():
+    print "--memory-limit and --mapped only apply to the imperative engine"
 
 def print_result(pairs, suitability,customer_names, product_names):
-    for cust, prod in enumerate(pairs):
+    """customer_names may be any iterable, product_names anything indexable"""
+    for prod, customer in izip(pairs, customer_names):
         if(prod != -1):
-            print customer_names[cust] + " => " + product_names[prod]
+            print customer + " => " + product_names[prod]
         else:
-            print customer_names[cust] + " does not receive an offer"
+            print customer + " does not receive an offer"
     
     print ""
     print "Total suitability: " + str(suitability)
 
 def main(args):
-    if(len(args) < 3 or args[1] in ["--help", "-h", "help"]):
+    stats = None
+    if("--stats" in args):
+        args = [arg for arg in args if arg != "--stats"]
+        stats = matcher_stats.Stats()
+    
+    mapped = "--mapped" in args
+    args = [arg for arg in args if arg != "--mapped"]
+    
+    memory_limit = None
+    for arg in [arg for arg in args if arg.startswith("--memory-limit=")]:
+        args = [other for other in args if other != arg]
+        try:
+            memory_limit = int(float(arg.split("=", 1)[1]) * 1048576)
+        except ValueError:
+            print_help()
+            return 0
+    
+    # Only a single imperative run takes the matrix options
+    matrix_options = mapped or memory_limit != None
+    
+    if(len(args) > 1 and args[1] == "serve"):
+        if(matrix_options):
+            print_matrix_notice()
+        try:
+            port = int((args[2:3] or [8080])[0])
+            server.serve(port, (args[3:4] or [server.DEFAULT_MODE])[0])
+        except ValueError, error:
+            print error
+            print_help()
+    elif(len(args) < 3 or args[1] in ["--help", "-h", "help"]):
         print_help()
+    elif(args[1] == "batch"):
+        if(matrix_options):
+            print_matrix_notice()
+        if(len(args) > 3):
+            mode = args[3]
+        else:
+            mode = "imperative"
+        
+        try:
+            run_batch(args[2], mode)
+        except (IOError, ValueError), error:
+            print error
+            print_help()
     else:
+        product_file  = args.pop()
+        customer_file = args.pop()
+        
+        if(len(args) < 2):
+            mode = "imperative"
+        else:
+            mode = args[1]
+        
         try:
-            product_names  = open(args.pop()).read().replace("\r","").split('\n')
-            customer_names = open(args.pop()).read().replace("\r","").split('\n')
+            if(mode == "classes"):
+                # Only the name features are kept for the solve
+                customer_features = loader.read_features(customer_file)
+                product_lengths   = loader.read_features(product_file)[0]
+            else:
+                product_names  = loader.read_names(product_file)
+                customer_names = loader.read_names(customer_file)
             
         except:
             print_help()
             return 0
         
-        if(len(args) < 2 or args[1] == "imperative"):
-            result = run_imperative(customer_names, product_names)
+        if(mode == "classes"):
+            result = run_class_features(customer_features, product_lengths)
+            
+            # Stream the names back in to print the result
+            customer_names = loader.iter_names(customer_file)
+            product_names  = loader.select_names(product_file, result[0])
         else:
-            result = run_functional(customer_names, product_names)
+            options = {}
+            if(mode == "imperative"):
+                options = {"stats" : stats, "memory_limit" : memory_limit, "mapped" : mapped}
+            
+            # Any other mode runs the functional version, as it always has
+            try:
+                result = RUNNERS.get(mode, run_functional)(customer_names, product_names, **options)
+            except MemoryError, error:
+                print error
+                return 1
 
         print_result(result[0], result[1],customer_names, product_names)
+        
+        if(mode == "greedy"):
+            gap = result[2] - result[1]
+            print "Upper bound: %s (the matching is within %s, or %.2f%%, of the best)" % \
+                  (result[2], gap, 100.0 * gap / max(result[2], 1e-9))
+        
+        if(stats != None):
+            print ""
+            if(mode == "imperative"):
+                print stats.report()
+            else:
+                print "--stats is only collected by the imperative engine"
+        
+        if(matrix_options and mode != "imperative"):
+            print ""
+            print_matrix_notice()
 
 if __name__ == "__main__":
     main(sys.argv)
@@ -1,6 +1,9 @@
 #!/usr/bin/env python2.6
 '''Provides a series of static functions to operate on matrices (2d lists)
 
+Values that are the same for a whole row or matrix (its min or max) are
+computed once and passed down, so every function is a single O(n^2) pass
+
 Created on May 4, 2010
 @author: Andrew Metcalf
 '''
@@ -11,7 +14,10 @@ def subtract_row_min(matrix):
     
 
 def subtract_min_from_row(row): 
-    return map(lambda item: item - min(row), row)
+    return subtract_from_row(row, min(row))
+
+def subtract_from_row(row, value):
+    return map(lambda item: item - value, row)
     
     
 def augment_matrix(matrix): 
@@ -19,20 +25,29 @@ def augment_matrix(matrix):
     return (len(matrix[0]) == len(matrix) and matrix) or do_augment(matrix)
  
 def do_augment(matrix): 
-    return (len(matrix[0]) < len(matrix) and augment_matrix(add_col(matrix)))\
-            or augment_matrix(add_row(matrix))
+    return (len(matrix[0]) < len(matrix) and add_col(matrix, len(matrix)-len(matrix[0])))\
+            or add_row(matrix, len(matrix[0])-len(matrix))
  
-def add_row(matrix): 
-    return matrix+[create_row(len(matrix[0]))]
+def add_row(matrix, count = 1): 
+    return matrix+map(lambda index: create_row(len(matrix[0])), range(count))
 
-def add_col(matrix): 
-    return map(lambda row: row+[0], matrix)
+def add_col(matrix, count = 1): 
+    return map(lambda row: row+create_row(count), matrix)
 
 
-def create_row(elements, value = 0, row = []): 
-    return(elements == 0 and row) or create_row(elements-1,value, row+[value])
+def create_row(elements, value = 0): 
+    """Elements share value, which is never modified"""
+    return [value]*elements
  
  
+def scale_matrix(matrix, scale):
+    """Multiplies each element by scale and rounds it to an exact integer"""
+    return map(lambda row: map(lambda item: int(round(item*scale)), row), matrix)
+
+
 def min_matrix(matrix): 
     """Replaces each element in the matrix with max(matrix)-element"""
-    return map(lambda row: map(lambda item: max(max(matrix))-item,row), matrix)
+    return subtract_matrix_from(max(max(matrix)), matrix)
+
+def subtract_matrix_from(value, matrix):
+    return map(lambda row: map(lambda item: value-item, row), matrix)
@@ -6,9 +6,15 @@ Created on May 2, 2010
 '''
 
 from fractions import gcd
+import name_cache #@UnresolvedImport
+import length_table #@UnresolvedImport
 
 VOWELS = ['a','e','i','o','u']
 CONSONANTS = ['b','c','d','f','g','h','j','k','l','m','n','p','q','r','s','t','v','w','x','y','z']
+
+# Every score is a letter count multiplied by 1, 1.5 or 2.25, so multiplying
+# it by SCALE always gives an exact integer
+SCALE = 4
     
 def get_suitability(customer, product):
     """Determines the suitability of a product for the customer
@@ -24,14 +30,32 @@ def get_suitability(customer, product):
     
     Returns: A suitability score (float)
     """
-    return ((len(product) % 2 == 0 and 1.5*count_letters(customer, VOWELS)) \
-            or (len(product) % 2 != 0 and count_letters(customer,CONSONANTS))) * \
-            (((has_common_factor(len(customer), len(product)) and 1.5)) or 1)
+    return feature_suitability(name_features(customer), len(product))
+
+def feature_suitability(features, product_length):
+    """Determines the suitability of a product from the customer's name features
+    and the length of the product name (see get_suitability)
+    """
+    return branch_scores(features)[length_table.gcd_branch(features[0], product_length)]
 
+def branch_scores(features):
+    """Returns the scores of a customer indexed by length_table branch:
+    even product length, odd, even with a common factor, odd with one
+    """
+    return (1.5*features[1], features[2], 2.25*features[1], 1.5*features[2])
+
+def name_features(name):
+    """Returns the (length, vowels, consonants) features of a customer name,
+    from the process-wide name_cache
+    """
+    features = name_cache.name_features(name)
+    return (features[0], features[2], features[3])
 
 def count_letters(word,letters): 
-    return reduce(lambda curr,letter: curr + word.lower().count(letter), \
-                  letters, 0)
+    return count_lower_letters(word.lower(), letters)
+
+def count_lower_letters(word, letters):
+    return reduce(lambda curr,letter: curr + word.count(letter), letters, 0)
 
 def has_common_factor(num1, num2):
     return gcd(num1, num2) > 1
\ No newline at end of file
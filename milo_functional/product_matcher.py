@@ -17,13 +17,24 @@ Note on structure: To make the functional implementation clearer, helper functio
 that are only called by one other function are grouped under that function.
 Helpers that are called by multiple functions are at the bottom of the file
 
+Note on recursion: Python has no tail calls, so each algorithm step returns a
+thunk (a function of no arguments) for the next step instead of calling it.
+trampoline calls the thunks in turn, so the stack depth stays constant however
+many steps a run takes
+
+Note on data structures: While the algorithm runs, the matrix and cover lists
+are pvector.PVectors, so marking a cell or covering a line copies O(log n)
+nodes rather than the whole matrix.  run_matcher returns plain lists
+
 Created on May 2, 2010
 @author: Andrew Metcalf
 '''
 
 import names #@UnresolvedImport
+import length_table #@UnresolvedImport
 import matrix_functions #@UnresolvedImport
-from sys import maxint
+from pvector import PVector, pmatrix #@UnresolvedImport
+from itertools import izip, islice, chain
      
 ###############################################
 # PUBLIC INSTANCE METHODS
@@ -55,11 +66,11 @@ def match_suitability(result, suitability):
 
 def run_matcher(suitability):
     """Run the hungarian algorithm on the given suitability matrix"""
-    return next_iteration(cover_columns(setup_matrix(suitability)))
+    return map(list, trampoline(next_iteration(cover_columns(setup_matrix(suitability)))))
 
 def next_iteration(result):
     return (len(result) == 1 and result[0]) or \
-            next_iteration(prime_zeroes(*result))
+            (lambda: prime_zeroes(*result))
 
 def match_products(suitability):
     """Determine the optimal matching of customer to products given a suitability matrix
@@ -81,7 +92,7 @@ def find_row_result(row,width):
 
 def setup_matrix(suitability):
     """
-    1. Computes the suitability matrix, 
+    1. Scales the suitability matrix to exact integers, so zeroes are found exactly
     2. Converts it to an n x n minimum assignment problem
     3. Starts the Hungarian algorith by subtracting the smallest value from each row 
     and starring zeros 
@@ -90,17 +101,25 @@ def setup_matrix(suitability):
                 matrix_functions.subtract_row_min( \
                     matrix_functions.min_matrix( \
                         matrix_functions.augment_matrix( \
-                            suitability))))
+                            matrix_functions.scale_matrix(suitability, names.SCALE)))))
 
 def suitability_matrix(customer_names, product_names):
-    """Returns a matrix of suitability scores between customers and products"""
-    return map(lambda customer_name: suitability_row(customer_name, product_names), \
-               customer_names)
+    """Returns a matrix of suitability scores between customers and products
+    
+    The features of each name are extracted once rather than once per cell
+    """
+    return features_matrix(map(names.name_features, customer_names), \
+                           map(len, product_names))
 
+def features_matrix(customer_features, product_lengths):
+    length_table.ensure(max(product_lengths or [0]))
+    return map(lambda features: suitability_row(features, product_lengths), \
+               customer_features)
 
-def suitability_row(customer_name, product_names):
-    return map(lambda product_name: names.get_suitability(customer_name,product_name), \
-               product_names)
+def suitability_row(features, product_lengths):
+    """Looks each score up by the branch its two lengths take in length_table"""
+    return length_table.branch_values(names.branch_scores(features), features[0], \
+                                      product_lengths, by_gcd = True)
 
 ###############################################
 # HUNGARIAN ALGORITHM STEPS
@@ -110,20 +129,22 @@ def suitability_row(customer_name, product_names):
 def star_zeroes(matrix):
     """
     Traverse the matrix and star any zero that does not have a starred zero in its row or column
-    Returns the new matrix
+    Returns the new matrix as a PVector of PVector rows
     """
-    return star_row_zeroes(iter(matrix))
+    return pmatrix(star_row_zeroes(matrix))
     
-def star_row_zeroes(row_iter, input = [[],[]]):
-    try:
-        return star_row_zeroes(row_iter, star_curr_row(row_iter.next(), input))
-    except StopIteration:
-        return input[1]
+def star_row_zeroes(matrix):
+    """Stars the rows in order, carrying [starred columns, starred rows]"""
+    return reduce(lambda input, row: star_curr_row(row, input, unstarred_zero(row, input[0])), \
+                  matrix, [frozenset(), []])[1]
 
-def star_curr_row(row, input, pos = 0):
-    return (pos >= len(row) and [input[0], input[1]+[create_unstared_row(row)]]) or \
-            ((pos in input[0] or row[pos] != 0) and star_curr_row(row, input, pos+1)) or \
-            [input[0]+[pos], input[1]+[create_stared_row(row, pos)]]            
+def unstarred_zero(row, starred_cols):
+    return next((pos for pos, item in enumerate(row) \
+                 if item == 0 and pos not in starred_cols), -1)
+
+def star_curr_row(row, input, pos):
+    return (pos == -1 and [input[0], input[1]+[create_unstared_row(row)]]) or \
+            [input[0] | frozenset([pos]), input[1]+[create_stared_row(row, pos)]]
 
 def create_unstared_row(row):
     return map(lambda item: [item, 0], row)
@@ -144,7 +165,7 @@ def check_done(matrix, covered_columns):
     If so, return [matrix] otherwise, return [matrix,covered)rows,covered_cols]
     """
     return (covered_columns.count(True) == len(matrix) and [matrix]) or \
-            [matrix,get_false_row(len(matrix)),covered_columns]
+            [matrix,PVector(get_false_row(len(matrix))),PVector(covered_columns)]
    
 def get_marks(matrix, mark):
     return map(lambda row: get_row_marks(row,mark), matrix)
@@ -153,7 +174,7 @@ def get_false_row(elements):
     return matrix_functions.create_row((elements),False) 
 
 ############## PRIME ZEROES FUNCTIONS ##############
-def prime_zeroes(matrix, covered_rows, covered_cols):
+def prime_zeroes(matrix, covered_rows, covered_cols, starred = None):
     """Finds the minimum number of lines required to cover all zeroes
     or identifies a potential for an alternative starring
     
@@ -163,8 +184,11 @@ def prime_zeroes(matrix, covered_rows, covered_cols):
        cover this row, uncover this column otherwise, adjust matrix
     4. Repeat
     
+    starred is the star whose row was just covered and column uncovered,
+    which lets the search for the next zero resume rather than restart
     """
     return prime_uncovered(matrix,covered_rows, covered_cols, \
+                         (starred and next_uncovered_zero(matrix,covered_rows,covered_cols,starred)) or \
                          uncovered_zero(matrix,covered_rows,covered_cols))
     
 def prime_uncovered(matrix, covered_rows, covered_cols, uncovered):
@@ -179,23 +203,38 @@ def get_starred(matrix, covered_rows, covered_cols, uncovered):
         
 def cover_star(matrix, covered_rows, covered_cols, starred, uncovered):
     return (starred[1] != -1 and \
-        prime_zeroes(matrix, set_value(covered_rows, starred[0],True),\
-                     set_value(covered_cols, starred[1], False))) or \
+        (lambda: prime_zeroes(matrix, set_value(covered_rows, starred[0],True),\
+                              set_value(covered_cols, starred[1], False), starred))) or \
         construct_path(matrix,uncovered)
 
 def set_value(items, index, value):
-    return map(lambda item, i: (i == index and value) or (item and i != index), \
-               items,range(len(items)))
+    return items.set(index, value)
 
-def uncovered_zero(matrix, covered_rows, covered_cols, row = 0):
+def uncovered_zero(matrix, covered_rows, covered_cols):
     """Find the first uncovered zero in the matrix"""
-    return (not covered_rows[row] and uncovered_zero_row(matrix[row], covered_cols, row)) or \
-            (row+1 < len(matrix) and uncovered_zero(matrix,covered_rows, covered_cols, row+1)) or \
-            (-1,-1)
+    return next((zero for zero in uncovered_zeroes(matrix, covered_rows, covered_cols)), (-1,-1))
     
-def uncovered_zero_row(row, covered_cols, row_num, col = 0):
-    return (not covered_cols[col] and row[col][0] == 0 and (row_num, col)) or \
-            (col+1 < len(row) and uncovered_zero_row(row,covered_cols,row_num, col+1))
+def uncovered_zeroes(matrix, covered_rows, covered_cols):
+    """Lazily generates the position of each uncovered zero in row-major order"""
+    return row_major_zeroes(matrix, covered_rows, tuple(covered_cols))
+
+def next_uncovered_zero(matrix, covered_rows, covered_cols, starred):
+    """Find the first uncovered zero once the row of starred is covered and its column uncovered
+    
+    The zero primed in that row was the first uncovered one, so above it only the
+    uncovered column can hold a zero and below it the search carries on as before
+    """
+    return next(chain(((row_num, starred[1]) for row_num in xrange(starred[0]) \
+                            if not covered_rows[row_num] and matrix[row_num][starred[1]][0] == 0), \
+                      row_major_zeroes(matrix, covered_rows, tuple(covered_cols), starred[0]+1)), \
+                (-1,-1))
+
+def row_major_zeroes(matrix, covered_rows, covered_cols, first_row = 0):
+    # Zeroes are rare, so they are tested for before the (tuple) column cover
+    return ((row_num, col) for row_num, (row, row_covered) in \
+                enumerate(islice(izip(matrix, covered_rows), first_row, None), first_row) \
+                if not row_covered \
+                    for col, item in enumerate(row) if item[0] == 0 and not covered_cols[col])
 
 ############## CONSTRUCT PATH FUNCTIONS ##############
 def construct_path(matrix, primed):
@@ -208,10 +247,11 @@ def construct_path(matrix, primed):
         D. Repeat until no zero is found in step 2
     2. Unstar each primed zero, prime each starred zero within the series
     3. Erase all primes and uncover the matrix
-    4. Return to cover_columns
+    4. Return to cover_columns and start the next iteration
     
     """    
-    return cover_columns(unprime_all(apply_path(*add_primed(matrix,primed,[]))))
+    return lambda: next_iteration(cover_columns(unprime_all(apply_path( \
+                        *trampoline(add_primed(matrix,primed,[]))))))
 
 def find_starred(matrix,last,path):
     return add_starred(matrix,[starred_position(extract_col(matrix,last[1])),last[1]],path)
@@ -222,7 +262,7 @@ def extract_col(matrix, col):
 
 def add_starred(matrix,starred,path):
     return (starred[0] == -1 and [matrix,path]) or \
-            find_primed(matrix,starred,path+[starred])
+            (lambda: find_primed(matrix,starred,path+[starred]))
 
 def find_primed(matrix,last,path):
     return add_primed(matrix,[last[0],primed_position(matrix[last[0]])],path)
@@ -236,10 +276,12 @@ def apply_path(matrix, path):
                   set_mark(mat,item[0],item[1],1),path,matrix)
 
 def unprime_all(matrix):
-    return map(unprime_row,matrix)
+    """Rows without a prime are shared with the old matrix"""
+    return PVector(map(unprime_row,matrix))
 
 def unprime_row(row):
-    return map(lambda item: item[1] == 2 and [item[0],0] or item,row)  
+    return (primed_position(row) == -1 and row) or \
+            set_row_mark(row, primed_position(row), 0)
 
 ############## ADJUST MATRIX FUNCTIONS ##############
 def adjust_matrix(matrix, covered_rows, covered_cols):
@@ -250,57 +292,43 @@ def adjust_matrix(matrix, covered_rows, covered_cols):
         3. Subtract the smallest value from each uncovered column  
         4. Prime zeroes
         """
-    return prime_zeroes( \
+    return lambda: prime_zeroes( \
             do_adjust_matrix(matrix, covered_rows, covered_cols,\
                              min_uncovered(matrix, covered_rows, covered_cols)),\
                         covered_rows, covered_cols)
     
 def do_adjust_matrix(matrix,covered_rows, covered_cols, min_val):
-    return map(lambda row, index: do_adjust_row(\
-                ((covered_rows[index] and map(lambda item: [item[0] + min_val,item[1]], row)) or row),\
-                covered_cols,min_val),\
-                matrix,range(len(matrix)))
+    return PVector(map(lambda row, covered: PVector(do_adjust_row(\
+                ((covered and map(lambda item: [item[0] + min_val,item[1]], row)) or row),\
+                covered_cols,min_val)),\
+                matrix,covered_rows))
     
 def do_adjust_row(row,covered_cols,min_val):
-    return map(lambda item, index: (covered_cols[index] and item) or \
-               [item[0]-min_val,item[1]],row, range(len(row)))
+    return map(lambda item, covered: (covered and item) or \
+               [item[0]-min_val,item[1]],row, covered_cols)
 
 def min_uncovered(matrix, covered_rows, covered_cols):
-    """Find the minimum uncovered element 
-    (create a matrix with all covered rows set to maxint and find the minimum value)
-    """
-    return min(map(row_min,set_covered(matrix, covered_rows, covered_cols, maxint)))
-
-def row_min(row):
-    return min(map(lambda item: item[0],row))
-
-def set_covered(matrix, covered_rows, covered_cols, value):
-    """
-    Return a matrix with all covered elements set to value
-    NOTE: This new element is always unstarred
-    """
-    return map(lambda row, index: (covered_rows[index] and matrix_functions.create_row(len(row),[value,0]))\
-               or row_set_covered(row, covered_cols, value)\
-               ,matrix,range(len(matrix)))
-    
-def row_set_covered(row, covered_cols, value):
-    return map(lambda item, index: (covered_cols[index] and [value,0]) or \
-               item,row, range(len(row)))
+    """Find the minimum uncovered element without building a covered copy of the matrix"""
+    return min(item[0] for row, row_covered in izip(matrix, covered_rows) if not row_covered \
+                    for item, col_covered in izip(row, covered_cols) if not col_covered)
 
 
 ###############################################
 # HELPER METHODS
 ###############################################
 
+def trampoline(result):
+    """Calls result until it returns something other than a thunk"""
+    while callable(result):
+        result = result()
+    return result
+
 def set_mark(matrix,row,col,mark):
-    """Return a new matrix with the mark in row, col set to mark"""
-    return map(lambda list,index: (index == row and set_row_mark(list,col,mark)) or list \
-               ,matrix,range(len(matrix)))
+    """Return a new matrix with the mark in row, col set to mark, sharing all other rows"""
+    return matrix.set(row, set_row_mark(matrix[row],col,mark))
 
 def set_row_mark(list,col,mark):
-    return map(lambda item, index: (index == col and [item[0],mark]) or \
-                                    (index != col and item),\
-               list,range(len(list)))
+    return list.set(col, [list[col][0],mark])
 
 def starred_position(list):
     """Find the index of any starred zero in the list"""
@@ -312,10 +340,7 @@ def primed_position(list):
 
 def marked_positions(list, mark):
     """Find the index of any elements in the list with the specified mark"""
-    try:
-        return get_row_marks(list, mark).index(True)
-    except:
-        return -1
+    return next((pos for pos, item in enumerate(list) if item[1] == mark), -1)
     
 def get_row_marks(row, mark):
     """Return a list representing the mark elements from the row"""
@@ -0,0 +1,110 @@
+#!/usr/bin/env python2.6
+'''Implements an immutable vector with structural sharing
+
+A PVector is a trie of tuples with 32 children per node.  Changing an element
+with set copies only the O(log n) nodes on the path to it and returns a new
+vector, the old one is untouched and shares every other node.  PVectors can
+be indexed, iterated and compared like lists, so code that reads a matrix does
+not need to know whether it holds lists or PVectors.
+
+Usage:
+    vector = PVector([1,2,3])
+    changed = vector.set(1, 5)     # vector is still [1,2,3]
+    matrix = pmatrix([[1,2],[3,4]])
+
+Created on Oct 18, 2026
+'''
+
+from itertools import chain, izip
+
+BITS  = 5
+WIDTH = 1 << BITS
+MASK  = WIDTH - 1
+
+class PVector(object):
+
+    __slots__ = ('_size', '_shift', '_root')
+
+    def __init__(self, items = ()):
+        items = tuple(items)
+        nodes = _chunks(items)
+        shift = 0
+        while len(nodes) > 1:
+            nodes = _chunks(nodes)
+            shift += BITS
+
+        self._size = len(items)
+        self._shift = shift
+        self._root = (nodes and nodes[0]) or ()
+
+    ###############################################
+    # PUBLIC INSTANCE METHODS
+    ###############################################
+
+    def set(self, index, value):
+        """Returns a new vector with the element at index replaced by value"""
+        index = self._check_index(index)
+        vector = PVector.__new__(PVector)
+        vector._size = self._size
+        vector._shift = self._shift
+        vector._root = _set_node(self._root, self._shift, index, value)
+        return vector
+
+    def tolist(self):
+        return list(self)
+
+    def __getitem__(self, index):
+        index = self._check_index(index)
+        node = self._root
+        shift = self._shift
+        while shift > 0:
+            node = node[(index >> shift) & MASK]
+            shift -= BITS
+        return node[index & MASK]
+
+    def __iter__(self):
+        return (self._shift == 0 and iter(self._root)) or \
+                chain.from_iterable(_leaves(self._root, self._shift))
+
+    def __len__(self):
+        return self._size
+
+    def __eq__(self, other):
+        try:
+            return len(self) == len(other) and all(a == b for a, b in izip(self, other))
+        except TypeError:
+            return False
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "PVector(" + repr(self.tolist()) + ")"
+
+    def _check_index(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("PVector index out of range")
+        return index
+
+def pmatrix(rows):
+    """Returns a PVector of PVector rows"""
+    return PVector(map(PVector, rows))
+
+###############################################
+# TRIE HELPERS
+###############################################
+
+def _chunks(items):
+    return tuple(items[start:start+WIDTH] for start in range(0, len(items), WIDTH))
+
+def _set_node(node, shift, index, value):
+    pos = (index >> shift) & MASK
+    child = (shift == 0 and [value]) or [_set_node(node[pos], shift-BITS, index, value)]
+    return node[:pos] + tuple(child) + node[pos+1:]
+
+def _leaves(node, shift):
+    """Iterates over the leaf tuples below node, in order"""
+    return (shift == BITS and node) or \
+            chain.from_iterable(_leaves(child, shift-BITS) for child in node)
@@ -0,0 +1,325 @@
+#!/usr/bin/env python2.6
+'''Implements product-customer matching with the auction algorithm
+
+Each unassigned customer bids for the product that gives it the most
+suitability net of the product's price, raising the price by its margin over
+its second best product plus epsilon.  The highest bidder takes the product
+and the customer it displaces bids again.  The integer scores are multiplied
+by n+1 so that finishing with an epsilon of 1 leaves the assignment exactly
+optimal.  Epsilon starts near the score range and is divided by SCALING each
+phase, with the prices carried over, which keeps the number of bids small.
+
+With NumPy every unassigned customer bids at once (Jacobi bidding) using
+array operations; without it customers bid one at a time (Gauss-Seidel).
+With processes > 1 rounds of at least PARALLEL_BIDDERS bidders are split over
+a pool of worker processes, which read the scores and prices from shared
+memory, so one large run uses several cores.  Smaller rounds bid one at a
+time in the main process, where they would not repay the round trip, and
+problems too small for any round to reach PARALLEL_BIDDERS never start
+the pool or copy the scores to shared memory.
+
+Usage: identical to ProductMatcher, with an optional processes argument
+
+Created on Oct 18, 2026
+'''
+
+import features #@UnresolvedImport
+import matrix_functions #@UnresolvedImport
+import product_matcher #@UnresolvedImport
+from multiprocessing import Pool
+from multiprocessing.sharedctypes import RawArray
+from itertools import izip
+from operator import sub
+from sys import maxint
+import copy
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SCALING = 5
+
+# Rounds with fewer bidders bid one at a time in the main process
+PARALLEL_BIDDERS = 256
+
+class AuctionMatcher(product_matcher.ProductMatcher):
+
+    def __init__(self, customer_names, product_names, processes = 1):
+        self._customer_names = customer_names
+        self._product_names = product_names
+        self._processes = processes
+
+    ###############################################
+    # PUBLIC INSTANCE METHODS
+    ###############################################
+
+    def match_products(self):
+        """Computes the most suitable product matching
+
+        Returns the matching in the form described by
+        ProductMatcher.match_products
+        """
+
+        self._setup_matcher()
+
+        results = []
+        for col in auction(self._benefits, self._processes)[:self._height]:
+            if col < self._width:
+                results.append(col)
+            else:
+                results.append(-1)
+
+        return results
+
+    def _setup_matcher(self):
+        """
+        1. Computes the suitability matrix as integers scaled by names.SCALE
+        2. Pads it with zeroes to n x n
+        """
+
+        self._scores = features.scaled_suitability_matrix(self._customer_names, self._product_names)
+        self._height = len(self._scores)
+        self._width = len(self._scores[0])
+
+        self._benefits = matrix_functions.augment_matrix(copy.deepcopy(self._scores))
+
+###############################################
+# AUCTION
+###############################################
+
+def auction(benefits, processes = 1, parallel_bidders = PARALLEL_BIDDERS):
+    """Finds the assignment of rows to columns with the largest total benefit
+
+    Args:
+        benefits: n x n matrix of integers
+        processes: number of worker processes to bid with
+        parallel_bidders: smallest round that is split over the workers
+
+    Returns: The column assigned to each row
+    """
+
+    size = len(benefits)
+    if size == 1:
+        return [0]
+
+    # Any assignment within size of the best total is optimal once scaled
+    low = min(map(min, benefits))
+    values = [[(value - low) * (size + 1) for value in row] for row in benefits]
+    epsilon = max(map(max, values))
+
+    bidder = _make_bidder(values, processes, parallel_bidders)
+    try:
+        while True:
+            epsilon = max(1, epsilon / SCALING)
+            row_col = _auction_phase(bidder, size, epsilon)
+
+            if epsilon == 1:
+                return row_col
+    finally:
+        bidder.close()
+
+def _make_bidder(values, processes, parallel_bidders):
+    """Returns the bidder for values, sharing them with workers only when a
+    round can have parallel_bidders bidders (at most one per row)
+    """
+    if processes > 1 and len(values) >= parallel_bidders:
+        return _SharedBidder(values, processes, parallel_bidders)
+    elif numpy is not None:
+        return _ArrayBidder(values)
+
+    return _ListBidder(values)
+
+def _auction_phase(bidder, size, epsilon):
+    """Bids until every row is assigned, keeping the prices of the bidder
+
+    While at least bidder.round_size rows are unassigned they all bid at once
+    against the same prices (Jacobi bidding) and each column goes to its
+    highest bid.  Below that the rows bid one at a time (Gauss-Seidel), each
+    seeing the prices raised by the bid before.
+
+    Returns the column assigned to each row
+    """
+    row_col = [-1 for row in range(size)]
+    col_row = [-1 for col in range(size)]
+
+    bidders = range(size)
+    while bidders:
+        if len(bidders) >= bidder.round_size:
+            round_bidders = bidders
+        else:
+            round_bidders = bidders[:1]
+
+        (cols, amounts) = bidder.bid(round_bidders, epsilon)
+
+        # The first of equal bids wins
+        best = {}
+        for row, col, amount in izip(round_bidders, cols, amounts):
+            if col not in best or amount > best[col][1]:
+                best[col] = (row, amount)
+
+        displaced = []
+        for col, (row, amount) in best.iteritems():
+            bidder.prices[col] = amount
+            if col_row[col] != -1:
+                row_col[col_row[col]] = -1
+                displaced.append(col_row[col])
+
+            col_row[col] = row
+            row_col[row] = col
+
+        bidders = [row for row in bidders if row_col[row] == -1] + sorted(displaced)
+
+    return row_col
+
+###############################################
+# BIDDERS
+###############################################
+
+class _ListBidder(object):
+    """Bids one row at a time from lists"""
+
+    round_size = maxint
+
+    def __init__(self, values):
+        self._values = values
+        self.prices = [0 for col in values]
+
+    def bid(self, rows, epsilon):
+        return _bids(self._values, self.prices, rows, epsilon)
+
+    def close(self):
+        pass
+
+class _ArrayBidder(object):
+    """Bids every unassigned row at once with NumPy array operations"""
+
+    round_size = 1
+
+    def __init__(self, values):
+        self._values = numpy.array(values, dtype = numpy.int_)
+        self.prices = numpy.zeros(len(values), dtype = numpy.int_)
+
+    def bid(self, rows, epsilon):
+        return _bids(self._values, self.prices, rows, epsilon)
+
+    def close(self):
+        pass
+
+class _SharedBidder(object):
+    """Splits the bidding rows of each round over worker processes
+
+    The workers read the values and prices from shared memory, so a round
+    only sends them row numbers and only the bids come back.  This process
+    keeps its own copy of the prices and writes them to shared memory before
+    each round.
+    """
+
+    def __init__(self, values, processes, parallel_bidders):
+        size = len(values)
+        self.round_size = parallel_bidders
+        self._processes = processes
+
+        if numpy is not None:
+            self._values = numpy.array(values, dtype = numpy.int_)
+            self.prices = numpy.zeros(size, dtype = numpy.int_)
+        else:
+            self._values = values
+            self.prices = [0 for col in values]
+
+        self._shared_values = RawArray('l', size * size)
+        self._shared_prices = RawArray('l', size)
+        for row, row_values in enumerate(values):
+            self._shared_values[row * size:(row + 1) * size] = row_values
+
+        self._pool = Pool(processes, _init_worker,
+                          (self._shared_values, self._shared_prices, size))
+
+    def bid(self, rows, epsilon):
+        if len(rows) < self.round_size:
+            return _bids(self._values, self.prices, rows, epsilon)
+
+        self._shared_prices[:] = list(self.prices)
+
+        # One chunk of rows per worker
+        chunk = -(-len(rows) // self._processes)
+        results = self._pool.map(_worker_bids,
+                                 [(rows[start:start + chunk], epsilon)
+                                  for start in range(0, len(rows), chunk)])
+
+        cols = []
+        amounts = []
+        for (chunk_cols, chunk_amounts) in results:
+            cols.extend(chunk_cols)
+            amounts.extend(chunk_amounts)
+
+        return [cols, amounts]
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+
+###############################################
+# BIDS
+###############################################
+
+def _bids(values, prices, rows, epsilon):
+    """Returns [cols, amounts]: the column each row bids for and its bid"""
+    if numpy is not None:
+        return _array_bids(values, prices, rows, epsilon)
+
+    bids = [_row_bid(values[row], prices, epsilon) for row in rows]
+    return [[col for (col, amount) in bids], [amount for (col, amount) in bids]]
+
+def _row_bid(values, prices, epsilon):
+    """Returns (col, amount): the best column for the row and the bid for it"""
+    profits = map(sub, values, prices)
+    best = max(profits)
+    col = profits.index(best)
+
+    del profits[col]
+    return (col, prices[col] + best - max(profits) + epsilon)
+
+def _array_bids(values, prices, rows, epsilon):
+    rows = numpy.asarray(rows)
+    index = numpy.arange(len(rows))
+
+    profits = values[rows] - prices
+    cols = profits.argmax(axis = 1)
+    best = profits[index, cols]
+
+    profits[index, cols] = numpy.iinfo(profits.dtype).min
+    second = profits.max(axis = 1)
+
+    return [cols.tolist(), (prices[cols] + best - second + epsilon).tolist()]
+
+###############################################
+# WORKER PROCESSES
+###############################################
+
+_worker = {}
+
+def _shared_views(shared_values, shared_prices, size):
+    """Returns [values, prices] over the shared arrays, as NumPy arrays if possible"""
+    if numpy is not None:
+        return [numpy.frombuffer(shared_values, dtype = numpy.int_).reshape(size, size),
+                numpy.frombuffer(shared_prices, dtype = numpy.int_)]
+
+    return [_SharedRows(shared_values, size), shared_prices]
+
+class _SharedRows(object):
+    """Reads one row of a flat shared array at a time"""
+
+    def __init__(self, shared, size):
+        self._shared = shared
+        self._size = size
+
+    def __getitem__(self, row):
+        return self._shared[row * self._size:(row + 1) * self._size]
+
+def _init_worker(shared_values, shared_prices, size):
+    (_worker['values'], _worker['prices']) = _shared_views(shared_values, shared_prices, size)
+
+def _worker_bids(task):
+    (rows, epsilon) = task
+    return _bids(_worker['values'], _worker['prices'][:], rows, epsilon)
@@ -0,0 +1,304 @@
+#!/usr/bin/env python2.6
+'''Implements product-customer matching on score-equivalence classes
+
+Under the rules in names.Customer.get_suitability a product's score only
+depends on the length of its name, and a customer's score only depends on
+(length, vowels, consonants), where only the distinct prime factors of the
+length matter.  ClassMatcher groups both sides into these
+classes and solves the much smaller transportation problem between them
+(supplies are the class sizes), then hands out the names of each class to
+reproduce a per-customer assignment.  The total suitability is the same as
+ProductMatcher.match_products gives, while the solve only grows with the
+number of classes rather than the number of names.
+
+The transportation problem is solved as a min cost flow with successive
+shortest paths (Dijkstra over reduced costs), pushing the bottleneck
+capacity along each path.  Only shipments in use are stored, so a search
+costs O(classes x product classes).
+
+Usage: identical to ProductMatcher
+
+Created on Oct 18, 2026
+'''
+
+import features #@UnresolvedImport
+import names #@UnresolvedImport
+import product_matcher #@UnresolvedImport
+from sys import maxint
+import heapq
+
+class ClassMatcher(product_matcher.ProductMatcher):
+
+    def __init__(self, customer_names, product_names):
+        self._customer_names = customer_names
+        self._product_names = product_names
+        self._customer_features = None
+        self._product_lengths = None
+
+    @classmethod
+    def from_features(cls, customer_features, product_lengths):
+        """Creates a matcher from name features alone (see loader.read_features)
+
+        Args:
+            customer_features: [lengths, vowels, consonants] of the customers
+            product_lengths: lengths of the product names
+        """
+        matcher = cls([], [])
+        matcher._customer_features = customer_features
+        matcher._product_lengths = product_lengths
+        return matcher
+
+    ###############################################
+    # PUBLIC INSTANCE METHODS
+    ###############################################
+
+    def match_products(self):
+        """Computes the most suitable product matching
+
+        Returns the matching in the form described by
+        ProductMatcher.match_products
+        """
+
+        self._setup_matcher()
+
+        flows = transport(map(len, self._customer_classes),
+                          map(len, self._product_classes),
+                          self._class_scores)
+
+        # Hand out the members of each class in order
+        next_customer = [0 for i in self._customer_classes]
+        next_product  = [0 for j in self._product_classes]
+
+        results = [-1 for i in self._customer_class]
+        for (i, j), amount in sorted(flows.iteritems()):
+            customers = self._customer_classes[i][next_customer[i]:next_customer[i]+amount]
+            products  = self._product_classes[j][next_product[j]:next_product[j]+amount]
+
+            for customer, product in zip(customers, products):
+                results[customer] = product
+
+            next_customer[i] += amount
+            next_product[j]  += amount
+
+        return results
+
+    def match_suitability(self, matches):
+        """Determines the total suitability of a given matching"""
+
+        if not hasattr(self, "_class_scores"):
+            self._setup_matcher()
+
+        total = 0
+        for row, col in enumerate(matches):
+            if(col != -1):
+                total += self._class_scores[self._customer_class[row]][self._product_class[col]]
+
+        return total / float(names.SCALE)
+
+    ###############################################
+    # CLASS CONSTRUCTION
+    ###############################################
+
+    def _setup_matcher(self):
+        """
+        1. Groups customers by (radical of length, vowels, consonants) and
+           products by length
+        2. Computes the suitability matrix between one member of each class,
+           as integers scaled by names.SCALE
+        """
+
+        if self._customer_features is None:
+            self._customer_features = features.customer_features(self._customer_names)
+            self._product_lengths = features.product_features(self._product_names)
+
+        (lengths, vowels, consonants) = self._customer_features
+
+        (self._customer_classes, self._customer_class) = \
+            group_names(map(customer_key, lengths, vowels, consonants))
+        (self._product_classes, self._product_class) = \
+            group_names(self._product_lengths)
+
+        # Every member of a class scores the same, so score the first one
+        representatives = [members[0] for members in self._customer_classes]
+        self._class_scores = features.scaled_matrix(
+            [lengths[i] for i in representatives],
+            [vowels[i] for i in representatives],
+            [consonants[i] for i in representatives],
+            [self._product_lengths[members[0]] for members in self._product_classes])
+
+def customer_key(length, vowels, consonants):
+    """Returns the score-equivalence class of a customer name's features
+
+    Only the distinct prime factors of the length matter to the common
+    factor rule, so lengths such as 4 and 8 share a class
+    """
+    return (radical(length), vowels, consonants)
+
+def radical(number):
+    """Returns the product of the distinct prime factors of number (number if < 2)"""
+    result = 1
+    factor = 2
+    while factor * factor <= number:
+        if number % factor == 0:
+            result *= factor
+            while number % factor == 0:
+                number /= factor
+        factor += 1
+
+    if number > 1 or result == 1:
+        result *= number
+
+    return result
+
+def group_names(keys):
+    """Groups name indices by key
+
+    Returns [classes, class_of] where classes is a list of index lists (one per
+    distinct key, in order of first appearance) and class_of gives the class of
+    each index
+    """
+    class_ids = {}
+    classes = []
+    class_of = []
+
+    for index, key in enumerate(keys):
+        if key not in class_ids:
+            class_ids[key] = len(classes)
+            classes.append([])
+
+        classes[class_ids[key]].append(index)
+        class_of.append(class_ids[key])
+
+    return [classes, class_of]
+
+###############################################
+# TRANSPORTATION PROBLEM
+###############################################
+
+def transport(supply, demand, scores):
+    """Finds the maximum suitability transportation between two sets of classes
+
+    Ships min(sum(supply), sum(demand)) units in total, so every customer is
+    matched when there are enough products and vice versa.
+
+    Args:
+        supply: number of customers in each customer class
+        demand: number of products in each product class
+        scores: suitability matrix between customer and product classes
+
+    Returns: A dict mapping (customer class, product class) to the number
+        of matches between them
+    """
+
+    customers = len(supply)
+    products = len(demand)
+
+    if not customers or not products:
+        return {}
+
+    high = max(map(max, scores))
+    cost = [[high - score for score in row] for row in scores]
+
+    # Nodes are the customer classes, then the product classes, then the sink
+    sink = customers + products
+    potential = [0 for node in range(sink + 1)]
+
+    supply_left = list(supply)
+    demand_left = list(demand)
+    flows = {}
+    shipped = [{} for j in range(products)]
+
+    remaining = min(sum(supply), sum(demand))
+    while remaining > 0:
+        (dist, prev) = _shortest_paths(cost, potential, supply_left, demand_left, shipped)
+
+        # Cap at the sink distance for the nodes the search did not settle
+        for node, node_dist in enumerate(dist):
+            potential[node] += min(node_dist, dist[sink])
+
+        # Walk back to the source: [customer, product, customer, ..., product]
+        path = []
+        node = prev[sink]
+        while node != -1:
+            path.append(node)
+            node = prev[node]
+        path.reverse()
+
+        amount = min(remaining, supply_left[path[0]], demand_left[path[-1] - customers])
+        for k in range(1, len(path) - 1, 2):
+            amount = min(amount, shipped[path[k] - customers][path[k + 1]])
+
+        supply_left[path[0]] -= amount
+        demand_left[path[-1] - customers] -= amount
+        for k in range(len(path) - 1):
+            if k % 2 == 0:
+                (i, j) = (path[k], path[k + 1] - customers)
+                change = amount
+            else:
+                (i, j) = (path[k + 1], path[k] - customers)
+                change = -amount
+
+            flows[(i, j)] = flows.get((i, j), 0) + change
+            shipped[j][i] = flows[(i, j)]
+            if not flows[(i, j)]:
+                del flows[(i, j)]
+                del shipped[j][i]
+
+        remaining -= amount
+
+    return flows
+
+def _shortest_paths(cost, potential, supply_left, demand_left, shipped):
+    """Dijkstra over reduced costs from the classes with customers left
+
+    Customer classes reach every product class.  Product classes reach the
+    customer classes already shipped to them (undoing a shipment) and the
+    sink while they still have products left.  The search stops once the
+    sink is settled.
+
+    Returns [dist, prev] where prev gives the previous node on the path
+    (-1 at the source)
+    """
+    customers = len(supply_left)
+    products = len(demand_left)
+    sink = customers + products
+
+    dist = [maxint for node in potential]
+    prev = [-1 for node in potential]
+    done = [False for node in potential]
+
+    heap = []
+    for i, amount in enumerate(supply_left):
+        if amount > 0:
+            dist[i] = -potential[i]
+            heap.append((dist[i], i))
+    heapq.heapify(heap)
+
+    while heap:
+        (node_dist, node) = heapq.heappop(heap)
+        if done[node]:
+            continue
+        done[node] = True
+
+        if node == sink:
+            break
+
+        node_potential = node_dist + potential[node]
+        edges = []
+        if node < customers:
+            row = cost[node]
+            edges = [(customers + j, row[j]) for j in range(products)]
+        else:
+            j = node - customers
+            edges = [(i, -cost[i][j]) for i in shipped[j]]
+            if demand_left[j] > 0:
+                edges.append((sink, 0))
+
+        for (end, edge_cost) in edges:
+            end_dist = node_potential + edge_cost - potential[end]
+            if end_dist < dist[end]:
+                dist[end] = end_dist
+                prev[end] = node
+                heapq.heappush(heap, (end_dist, end))
+
+    return [dist, prev]
@@ -0,0 +1,136 @@
+#!/usr/bin/env python2.6
+'''Builds whole suitability matrices from per-name features
+
+The suitability rules in names.Customer only look at a handful of integers
+per name: the name length, its parity, and the customer's vowel and
+consonant counts.  This module pulls those features out of each name once
+and then produces every score of the matrix from them, instead of calling
+Customer.get_suitability once per cell.
+
+Scores are built as exact integers (the suitability times names.SCALE) and
+only divided back down for suitability_matrix.  NumPy is used to broadcast
+the features into the full matrix when it is installed.  Without it, each
+customer's four possible scores are computed once and every cell is filled
+by looking up the branch its two lengths take in length_table.
+
+Usage: Call suitability_matrix with a list of customer names and
+product names
+
+Created on Oct 18, 2026
+'''
+
+import names #@UnresolvedImport
+import name_cache #@UnresolvedImport
+import length_table #@UnresolvedImport
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def name_features(name):
+    """Returns (length, vowels, consonants) for a single name
+
+    Bulk passes compute the features without the name_cache, so that the
+    names are not kept and the cache lock is not taken once per name
+    """
+    (length, factors, vowels, consonants) = name_cache.compute_features(name)
+    return (length, vowels, consonants)
+
+def customer_features(customer_names):
+    """Returns lists of lengths, vowel counts and consonant counts"""
+    if not customer_names:
+        return ([], [], [])
+
+    return map(list, zip(*map(name_features, customer_names)))
+
+def product_features(product_names):
+    """Returns the list of product name lengths"""
+    return map(len, product_names)
+
+def has_common_factor(length1, length2):
+    """Matches names.Name.has_common_factor for two name lengths"""
+    return length_table.common_factor(length1, length2)
+
+def score(length, vowels, consonants, product_length):
+    """Returns the suitability of one product for one customer from their features"""
+    return scaled_score(length, vowels, consonants, product_length) / float(names.SCALE)
+
+def scaled_score(length, vowels, consonants, product_length):
+    """Returns the suitability multiplied by names.SCALE, as an exact integer"""
+    return branch_scores(vowels, consonants)[length_table.branch(length, product_length)]
+
+def branch_scores(vowels, consonants):
+    """Returns the scaled scores of a customer indexed by length_table branch
+
+    An even product length scores the vowels times 1.5 and an odd one the
+    consonants, each 50% more with a common factor
+    """
+    return (vowels * 6, consonants * 4, vowels * 9, consonants * 6)
+
+def suitability_matrix(customer_names, product_names):
+    """Returns a matrix (2d list) of suitability scores between customers and products
+
+    Scores are identical to those of names.Customer.get_suitability
+    """
+    (lengths, vowels, consonants) = customer_features(customer_names)
+    return feature_matrix(lengths, vowels, consonants, product_features(product_names))
+
+def scaled_suitability_matrix(customer_names, product_names):
+    """Returns suitability_matrix multiplied by names.SCALE, as exact integers"""
+    (lengths, vowels, consonants) = customer_features(customer_names)
+    return scaled_matrix(lengths, vowels, consonants, product_features(product_names))
+
+def feature_matrix(lengths, vowels, consonants, product_lengths):
+    """Returns the suitability matrix (2d list) from customer and product features"""
+    scale = float(names.SCALE)
+    return [[score / scale for score in row]
+            for row in scaled_matrix(lengths, vowels, consonants, product_lengths)]
+
+def scaled_matrix(lengths, vowels, consonants, product_lengths):
+    """Returns feature_matrix multiplied by names.SCALE, as exact integers"""
+    if numpy is not None and len(lengths) and len(product_lengths):
+        return scaled_array(lengths, vowels, consonants, product_lengths).tolist()
+
+    return list(scaled_rows(lengths, vowels, consonants, product_lengths))
+
+def scaled_rows(lengths, vowels, consonants, product_lengths):
+    """Yields the rows of scaled_matrix one at a time, as lists"""
+    length_table.ensure(max(product_lengths or [0]))
+
+    for length, vowel_count, consonant_count in zip(lengths, vowels, consonants):
+        # The score for every product length, then one lookup per cell
+        scores = branch_scores(vowel_count, consonant_count)
+        yield length_table.branch_values(scores, length, product_lengths)
+
+def scaled_max(lengths, vowels, consonants, product_lengths):
+    """Returns the largest value of scaled_matrix without building it
+
+    A score only depends on the product through its length, so each customer
+    is only scored against the distinct product lengths
+    """
+    distinct = sorted(set(product_lengths))
+    length_table.ensure(max(distinct or [0]))
+
+    high = 0
+    for length, vowel_count, consonant_count in zip(lengths, vowels, consonants):
+        scores = branch_scores(vowel_count, consonant_count)
+        high = max([high] + length_table.branch_values(scores, length, distinct))
+
+    return high
+
+def scaled_array(lengths, vowels, consonants, product_lengths):
+    """Broadcasts the name features into a NumPy integer array of scaled scores
+
+    Requires NumPy
+    """
+    lengths         = numpy.asarray(lengths)[:, numpy.newaxis]
+    vowels          = numpy.asarray(vowels)[:, numpy.newaxis]
+    consonants      = numpy.asarray(consonants)[:, numpy.newaxis]
+    product_lengths = numpy.asarray(product_lengths)[numpy.newaxis, :]
+
+    scores = numpy.where(product_lengths % 2 == 0, vowels * 6, consonants * 4)
+
+    common = (numpy.gcd(lengths, product_lengths) > 1) & (lengths > 0) & (product_lengths > 0)
+
+    return numpy.where(common, scores * 3 // 2, scores)
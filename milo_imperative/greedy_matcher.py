@@ -0,0 +1,276 @@
+#!/usr/bin/env python2.6
+'''Implements a fast approximate product-customer matching
+
+GreedyMatcher gives a good matching quickly, for previews, rather than the
+optimum.  It assigns pairs in order of descending suitability, then improves
+the result with 2-opt swaps: two customers exchange their products whenever
+that raises the total.  Unmatched customers (and unused products) take part
+in the swaps too, so a customer can also take over a product from another
+customer or move to a product nobody holds.
+
+A score only depends on the product through its length, so the products
+are grouped by length and each customer is scored once per distinct length
+L.  The greedy pass sorts m * L candidates, and each swap pass sorts every
+class's customers by their gain from moving to each other class, pairing
+the best movers in each direction, so a pass is O(m * L log m).
+
+upper_bound gives a dual bound on any matching.  Every product length gets
+a price, and no matching can beat the prices of all the products plus, for
+each customer, its best score less the price (or zero).  The prices start
+from the matching found: shortest path potentials (Bellman-Ford) over the
+classes that make every customer's class its best choice, which prove the
+matching optimal when they exist.  Each price is then moved in turn to
+where it lowers the bound most, for a few sweeps, and the bound is never
+above the sum of the row maxima.  gap is the distance from the bound, and
+the optimum lies within it.
+
+Usage: identical to ProductMatcher, with upper_bound and gap for a matching
+
+Created on Oct 18, 2026
+'''
+
+from itertools import izip
+from sys import maxint
+
+import names #@UnresolvedImport
+import features #@UnresolvedImport
+import length_table #@UnresolvedImport
+import product_matcher #@UnresolvedImport
+
+# Most 2-opt passes over the matching, each stopping early when nothing improves
+MAX_PASSES = 20
+
+# Most sweeps over the prices of upper_bound, stopping when the bound stays put
+BOUND_SWEEPS = 10
+
+class GreedyMatcher(product_matcher.ProductMatcher):
+
+    def __init__(self, customer_names, product_names, passes = MAX_PASSES):
+        self._customer_names = customer_names
+        self._product_names = product_names
+        self._passes = passes
+
+    ###############################################
+    # PUBLIC INSTANCE METHODS
+    ###############################################
+
+    def match_products(self):
+        """Computes a good, but not always the most suitable, product matching
+
+        Returns the matching in the form described by
+        ProductMatcher.match_products
+        """
+
+        self._setup_matcher()
+        self._greedy()
+
+        for i in range(self._passes):
+            if not self._improve():
+                break
+
+        # Hand out the products of each length lowest index first
+        available = [list(reversed(products)) for products in self._class_products]
+        results = []
+        for length_class in self._class_of[:len(self._customer_names)]:
+            if length_class < len(available):
+                results.append(available[length_class].pop())
+            else:
+                results.append(-1)
+
+        return results
+
+    def upper_bound(self):
+        """Returns a suitability that no matching of these names can exceed
+
+        The bound starts from the matching, which is found first if needed
+        """
+        if not self._customer_names or not self._product_names:
+            return 0.0
+        if not hasattr(self, "_class_of"):
+            self.match_products()
+
+        # Customers with the same scores always get the same share of the bound
+        weights = {}
+        for row in self._rows[:len(self._customer_names)]:
+            key = tuple(row)
+            weights[key] = weights.get(key, 0) + 1
+        rows = weights.keys()
+        counts = [weights[row] for row in rows]
+        supply = map(len, self._class_products)
+
+        no_prices = [0 for length_class in supply]
+        bound = _dual_bound([list(row) for row in rows], counts, no_prices, supply)
+
+        # Scores less prices, the last (unmatched) one always zero
+        prices = self._matching_prices()
+        reduced = [map(lambda score, price: score - price, row, prices + [0]) for row in rows]
+        bound = min(bound, _dual_bound(reduced, counts, prices, supply))
+
+        for sweep in range(BOUND_SWEEPS):
+            for length_class in range(len(supply)):
+                prices[length_class] = _best_price(rows, reduced, counts, supply[length_class], length_class)
+                for left, row in izip(reduced, rows):
+                    left[length_class] = row[length_class] - prices[length_class]
+
+            new_bound = _dual_bound(reduced, counts, prices, supply)
+            if new_bound >= bound:
+                break
+            bound = new_bound
+
+        return bound / float(names.SCALE)
+
+    def _matching_prices(self):
+        """Returns prices for the product lengths under which the matching is best
+
+        Every customer in class a must prefer it to any class b, so
+        price[a] - price[b] <= score[a] - score[b].  These constraints are
+        edges b -> a and the prices their shortest distances from the
+        unmatched class.  When the matching is not optimal there is a
+        negative cycle, and the prices after one round per class are used
+        as they are.  Prices are shifted up to be non-negative
+        """
+        classes = self._unmatched + 1
+        limit = [[maxint for second in range(classes)] for first in range(classes)]
+        for row, length_class in izip(self._rows, self._class_of):
+            limits = limit[length_class]
+            score = row[length_class]
+            for other in range(classes):
+                if score - row[other] < limits[other]:
+                    limits[other] = score - row[other]
+
+        distance = [maxint for length_class in range(classes)]
+        distance[self._unmatched] = 0
+        for i in range(classes):
+            changed = False
+            for first in range(classes):
+                for second in range(classes):
+                    if distance[second] != maxint and limit[first][second] != maxint and \
+                       distance[second] + limit[first][second] < distance[first]:
+                        distance[first] = distance[second] + limit[first][second]
+                        changed = True
+            if not changed:
+                break
+
+        low = min([0] + [price for price in distance if price != maxint])
+        return [max(0, price - low) if price != maxint else 0 for price in distance[:self._unmatched]]
+
+    def gap(self, matches):
+        """Returns how far the suitability of matches may be below the optimum"""
+        return self.upper_bound() - self.match_suitability(matches)
+
+    ###############################################
+    # GREEDY AND 2-OPT STEPS
+    ###############################################
+
+    def _setup_matcher(self):
+        """
+        1. Groups the products by name length
+        2. Scores every customer against each length, with a last score of
+           zero for being unmatched
+        """
+        (lengths, vowels, consonants) = features.customer_features(self._customer_names)
+        product_lengths = features.product_features(self._product_names)
+
+        classes = sorted(set(product_lengths))
+        class_index = dict((length, index) for index, length in enumerate(classes))
+        self._class_products = [[] for length in classes]
+        for col, length in enumerate(product_lengths):
+            self._class_products[class_index[length]].append(col)
+
+        length_table.ensure(max(classes or [0]))
+        self._rows = []
+        for length, vowel_count, consonant_count in zip(lengths, vowels, consonants):
+            scores = features.branch_scores(vowel_count, consonant_count)
+            self._rows.append(length_table.branch_values(scores, length, classes) + [0])
+
+        # Products left over take part in the swaps as customers scoring zero
+        self._unmatched = len(classes)
+        self._class_of = [self._unmatched for row in self._rows]
+
+    def _greedy(self):
+        """Assign pairs in order of descending suitability while both are free"""
+        free = map(len, self._class_products)
+        left = min(len(self._rows), sum(free))
+
+        candidates = sorted((-score, row, length_class)
+                            for row, scores in enumerate(self._rows)
+                            for length_class, score in enumerate(scores[:-1]))
+
+        for (score, row, length_class) in candidates:
+            if not left:
+                break
+            if self._class_of[row] == self._unmatched and free[length_class]:
+                self._class_of[row] = length_class
+                free[length_class] -= 1
+                left -= 1
+
+        zero_row = [0 for score in range(self._unmatched + 1)]
+        for length_class, count in enumerate(free):
+            self._rows.extend([zero_row] * count)
+            self._class_of.extend([length_class] * count)
+
+    def _improve(self):
+        """Make every improving swap between two classes in one pass
+
+        For each pair of classes the members of each are sorted by what they
+        gain by moving to the other, and the best movers of both sides swap
+        while their gains add up to more than zero.  A member that has
+        swapped waits for the next pass.
+
+        Returns whether anything was swapped
+        """
+        members = [[] for length_class in range(self._unmatched + 1)]
+        for row, length_class in enumerate(self._class_of):
+            members[length_class].append(row)
+
+        rows = self._rows
+        moved = [False for row in rows]
+        improved = False
+
+        for first in range(len(members)):
+            for second in range(first + 1, len(members)):
+                if not members[first] or not members[second]:
+                    continue
+
+                outgoing = sorted(((rows[row][second] - rows[row][first], row)
+                                   for row in members[first] if not moved[row]), reverse = True)
+                incoming = sorted(((rows[row][first] - rows[row][second], row)
+                                   for row in members[second] if not moved[row]), reverse = True)
+
+                for (out_gain, out_row), (in_gain, in_row) in izip(outgoing, incoming):
+                    if out_gain + in_gain <= 0:
+                        break
+
+                    self._class_of[out_row] = second
+                    self._class_of[in_row] = first
+                    moved[out_row] = moved[in_row] = True
+                    improved = True
+
+        return improved
+
+###############################################
+# UPPER BOUND
+###############################################
+
+def _dual_bound(reduced, counts, prices, supply):
+    """Returns the bound given by the prices, reduced holding scores less prices"""
+    return sum(map(lambda price, count: price * count, prices, supply)) + \
+           sum(max(left) * count for left, count in izip(reduced, counts))
+
+def _best_price(rows, reduced, counts, supply, length_class):
+    """Returns the price of length_class that lowers the bound most
+
+    A customer only takes the class over its best other choice while the
+    price is below its margin, so the bound is lowest when the price is the
+    margin at which the customers taking the class first reach its supply
+    """
+    margins = sorted(((row[length_class] - max(left[:length_class] + left[length_class + 1:]), count)
+                      for row, left, count in izip(rows, reduced, counts)), reverse = True)
+
+    taken = 0
+    for (margin, count) in margins:
+        taken += count
+        if taken >= supply:
+            return max(0, margin)
+
+    return 0
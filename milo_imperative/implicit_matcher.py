@@ -0,0 +1,78 @@
+#!/usr/bin/env python2.6
+'''Implements product-customer matching without storing the suitability matrix
+
+Every cost only depends on a few integers per name: the customer's length
+and its four possible scores (see features.branch_scores), and the product's
+length.  ImplicitMatcher keeps those per-name features and nothing else of
+the matrix.  FeatureCosts computes a row of costs from them whenever the
+augmenting path search of RectangularMatcher (jv_matcher.augment) scans that
+row, and the search turns it into reduced costs with the dual potentials.
+
+Memory is O(m + n) for m customers and n products: the features, the duals
+and the assignment.  Time is that of RectangularMatcher, each row of costs
+being rebuilt with one table lookup per cell instead of read back.
+
+Usage: identical to ProductMatcher
+
+Created on Oct 18, 2026
+'''
+
+from itertools import izip
+
+import features #@UnresolvedImport
+import length_table #@UnresolvedImport
+import rectangular_matcher #@UnresolvedImport
+
+class ImplicitMatcher(rectangular_matcher.RectangularMatcher):
+
+    def __init__(self, customer_names, product_names):
+        self._customer_names = customer_names
+        self._product_names = product_names
+
+    def _setup_matcher(self):
+        """Keeps the name features behind a cost matrix with the shorter side as rows"""
+        (lengths, vowels, consonants) = features.customer_features(self._customer_names)
+        product_lengths = features.product_features(self._product_names)
+
+        self._height = len(lengths)
+        self._width = len(product_lengths)
+        self._transposed = self._height > self._width
+        self._cost = FeatureCosts(lengths, vowels, consonants, product_lengths, self._transposed)
+
+class FeatureCosts(object):
+    """The cost matrix of RectangularMatcher, computed a row at a time
+
+    Costs are measured down from the top score, as in RectangularMatcher.
+    Rows are customers, or products when transposed
+    """
+
+    def __init__(self, lengths, vowels, consonants, product_lengths, transposed = False):
+        self._lengths = lengths
+        self._scores = map(features.branch_scores, vowels, consonants)
+        self._product_lengths = product_lengths
+        self._transposed = transposed
+        self._top = features.scaled_max(lengths, vowels, consonants, product_lengths)
+
+    def __len__(self):
+        if self._transposed:
+            return len(self._product_lengths)
+        return len(self._lengths)
+
+    def __getitem__(self, row):
+        top = self._top
+        if self._transposed:
+            # A product scores its length's parity, and the common factor bit
+            # is the same whichever of the two lengths indexes the table
+            product_length = self._product_lengths[row]
+            odd = product_length % 2
+            common = length_table.branch_row(product_length)
+            try:
+                return [top - scores[odd | (common[length] & length_table.EVEN_COMMON)]
+                        for scores, length in izip(self._scores, self._lengths)]
+            except IndexError:
+                # A customer name longer than the table
+                return [top - scores[length_table.branch(length, product_length)]
+                        for scores, length in izip(self._scores, self._lengths)]
+
+        costs = [top - score for score in self._scores[row]]
+        return length_table.branch_values(costs, self._lengths[row], self._product_lengths)
@@ -0,0 +1,358 @@
+#!/usr/bin/env python2.6
+'''Implements product-customer matching with shortest augmenting paths
+
+JVMatcher computes the same maximum suitability assignment as ProductMatcher
+but replaces the step-based Munkres loop with the shortest augmenting path
+method of Jonker and Volgenant.  A dual potential is kept for every row and
+column, so each customer is added to the matching by a single O(n^2)
+Dijkstra-like search over reduced costs.  The whole solve is O(n^3).
+
+Implementation based on:
+R. Jonker and A. Volgenant, "A shortest augmenting path algorithm for
+dense and sparse linear assignment problems", Computing 38 (1987)
+http://e-maxx.ru/algo/assignment_hungary
+
+Because the duals and the assignment are kept, small changes to the lists
+of names can be absorbed without solving from scratch.  Each insertion,
+deletion or rename frees a single row, which is then repaired with one
+more augmenting path, so an update costs O(n^2) rather than O(n^3).
+
+Usage:
+1. Initialize a new JVMatcher with a list of customer names and
+   a list of product names
+2. Call match_products to return a list with the product index assigned
+   to each customer in order
+3. Call match_suitability with the list of assignments to return the
+   suitability of the match
+4. Optionally call add_customer, remove_customer, rename_customer (or the
+   product equivalents) and get_matching to follow changes to the names
+
+Created on Oct 18, 2026
+'''
+
+import names #@UnresolvedImport
+import matrix_functions #@UnresolvedImport
+import product_matcher #@UnresolvedImport
+import features #@UnresolvedImport
+from sys import maxint
+import copy
+
+class JVMatcher(product_matcher.ProductMatcher):
+
+    def __init__(self, customer_names, product_names):
+        self._customer_names = list(customer_names)
+        self._product_names = list(product_names)
+        self._products = [names.Product(name) for name in product_names]
+        self._customers = [names.Customer(name) for name in customer_names]
+
+        self._size = max(len(customer_names),len(product_names))
+
+    ###############################################
+    # PUBLIC INSTANCE METHODS
+    ###############################################
+
+    def match_products(self):
+        """Computes the most suitable product matching
+
+        Returns the matching in the form described by
+        ProductMatcher.match_products
+        """
+
+        self._setup_matcher()
+
+        for row in range(self._size):
+            augment(self._matrix, self._u, self._v, self._row_col, self._col_row, row)
+
+        return self.get_matching()
+
+    def get_matching(self):
+        """Returns the current matching in the form described by match_products"""
+        results = []
+        for col in self._row_col[:self._height]:
+            if col < self._width:
+                results.append(col)
+            else:
+                results.append(-1)
+
+        return results
+
+    ###############################################
+    # INCREMENTAL UPDATES
+    ###############################################
+
+    def add_customer(self, name, index = None):
+        """Inserts a customer (at the end by default) and repairs the matching"""
+        self._ensure_solved()
+        if index is None:
+            index = self._height
+
+        if self._height < len(self._u):
+            # Reuse a padding row
+            self._remove_row(len(self._u) - 1)
+        else:
+            self._insert_col(len(self._v), [0 for row in self._u])
+
+        self._customer_names.insert(index, name)
+        self._customers.insert(index, names.Customer(name))
+        self._scores.insert(index, self._customer_scores(name))
+        self._height += 1
+
+        self._insert_row(index, self._row_costs(index))
+        self._repair()
+
+    def remove_customer(self, index):
+        """Deletes the customer at index and repairs the matching"""
+        self._ensure_solved()
+
+        del self._customer_names[index]
+        del self._customers[index]
+        del self._scores[index]
+        self._height -= 1
+        self._remove_row(index)
+
+        if self._height >= self._width:
+            # The matrix shrinks, drop a padding column
+            self._remove_col(len(self._v) - 1)
+        else:
+            self._insert_row(len(self._u), [0 for col in self._v])
+
+        self._repair()
+
+    def rename_customer(self, index, name):
+        """Changes the name of the customer at index and repairs the matching"""
+        self._ensure_solved()
+
+        self._customer_names[index] = name
+        self._customers[index] = names.Customer(name)
+        self._scores[index] = self._customer_scores(name)
+
+        self._remove_row(index)
+        self._insert_row(index, self._row_costs(index))
+        self._repair()
+
+    def add_product(self, name, index = None):
+        """Inserts a product (at the end by default) and repairs the matching"""
+        self._ensure_solved()
+        if index is None:
+            index = self._width
+
+        if self._width < len(self._v):
+            # Reuse a padding column
+            self._remove_col(len(self._v) - 1)
+        else:
+            self._insert_row(len(self._u), [0 for col in self._v])
+
+        self._product_names.insert(index, name)
+        self._products.insert(index, names.Product(name))
+        for row, score in zip(self._scores, self._product_scores(name)):
+            row.insert(index, score)
+        self._width += 1
+
+        self._insert_col(index, self._col_costs(index))
+        self._repair()
+
+    def remove_product(self, index):
+        """Deletes the product at index and repairs the matching"""
+        self._ensure_solved()
+
+        del self._product_names[index]
+        del self._products[index]
+        for row in self._scores:
+            del row[index]
+        self._width -= 1
+        self._remove_col(index)
+
+        if self._width >= self._height:
+            # The matrix shrinks, drop a padding row
+            self._remove_row(len(self._u) - 1)
+        else:
+            self._insert_col(len(self._v), [0 for row in self._u])
+
+        self._repair()
+
+    def rename_product(self, index, name):
+        """Changes the name of the product at index and repairs the matching"""
+        self._ensure_solved()
+
+        self._product_names[index] = name
+        self._products[index] = names.Product(name)
+        for row, score in zip(self._scores, self._product_scores(name)):
+            row[index] = score
+
+        self._remove_col(index)
+        self._insert_col(index, self._col_costs(index))
+        self._repair()
+
+    ###############################################
+    # SHORTEST AUGMENTING PATH STEPS
+    ###############################################
+
+    def _setup_matcher(self):
+        """
+        1. Computes the suitability matrix as integers scaled by names.SCALE
+        2. Converts it to an n x n minimum assignment problem
+        3. Clears the dual potentials and the assignment
+        """
+
+        self._scores = features.scaled_suitability_matrix(self._customer_names, self._product_names)
+        self._height = len(self._scores)
+        self._width = len(self._scores[0])
+
+        # Minimise the negated scores so that cells added later
+        # by the incremental updates need no common offset
+        self._matrix = matrix_functions.augment_matrix(copy.deepcopy(self._scores))
+        self._matrix = [[-score for score in row] for row in self._matrix]
+
+        self._u       = [0 for i in range(self._size)]
+        self._v       = [0 for i in range(self._size)]
+        self._row_col = [-1 for i in range(self._size)]
+        self._col_row = [-1 for i in range(self._size)]
+
+    def _ensure_solved(self):
+        if not hasattr(self, "_row_col"):
+            self.match_products()
+
+    def _repair(self):
+        """Augments from every unassigned row once the matrix is square again"""
+        self._size = len(self._u)
+        for row, col in enumerate(self._row_col):
+            if col == -1:
+                augment(self._matrix, self._u, self._v, self._row_col, self._col_row, row)
+
+    ###############################################
+    # HELPER METHODS
+    ###############################################
+
+    def _customer_scores(self, name):
+        return features.scaled_suitability_matrix([name], self._product_names)[0]
+
+    def _product_scores(self, name):
+        return [row[0] for row in features.scaled_suitability_matrix(self._customer_names, [name])]
+
+    def _row_costs(self, row):
+        """Costs of a customer row, including any padding columns"""
+        return [-score for score in self._scores[row]] + \
+               [0 for col in range(self._width, len(self._v))]
+
+    def _col_costs(self, col):
+        """Costs of a product column, including any padding rows"""
+        return [-row[col] for row in self._scores] + \
+               [0 for row in range(self._height, len(self._u))]
+
+    def _insert_row(self, index, costs):
+        """Adds an unassigned row, its potential is set by the next augmentation"""
+        self._matrix.insert(index, costs)
+        self._u.insert(index, 0)
+        self._row_col.insert(index, -1)
+        self._col_row = [row + 1 if row >= index else row for row in self._col_row]
+
+    def _insert_col(self, index, costs):
+        """Adds an unassigned column with the largest potential that keeps
+        every reduced cost non-negative
+        """
+        potential = 0
+        for row, cost in enumerate(costs):
+            self._matrix[row].insert(index, cost)
+        if costs:
+            potential = min([cost - u for cost, u in zip(costs, self._u)])
+
+        self._v.insert(index, potential)
+        self._col_row.insert(index, -1)
+        self._row_col = [col + 1 if col >= index else col for col in self._row_col]
+
+    def _remove_row(self, index):
+        del self._matrix[index]
+        del self._u[index]
+        col = self._row_col.pop(index)
+        if col != -1:
+            self._col_row[col] = -1
+        self._col_row = [row - 1 if row > index else row for row in self._col_row]
+
+    def _remove_col(self, index):
+        for row in self._matrix:
+            del row[index]
+        del self._v[index]
+        row = self._col_row.pop(index)
+        if row != -1:
+            self._row_col[row] = -1
+        self._row_col = [col - 1 if col > index else col for col in self._row_col]
+
+###############################################
+# SHORTEST AUGMENTING PATH
+###############################################
+
+def augment(cost, u, v, row_col, col_row, row):
+    """Add the unassigned row to the assignment along a shortest augmenting path
+
+    The reduced cost cost[i][j]-u[i]-v[j] must be non-negative everywhere and
+    zero for every assigned pair.  Both properties still hold on return, so
+    the assignment stays optimal for the rows added so far.  cost may have
+    more columns than rows.
+
+    Args:
+        cost: matrix (2d list) of costs to minimise
+        u, v: row and column dual potentials, updated in place
+        row_col, col_row: the assignment in both directions (-1 when
+            unassigned), updated in place
+        row: the unassigned row to add
+
+    Returns: The number of columns on the augmenting path
+    """
+
+    width = len(v)
+    min_slack = [maxint] * width
+    way       = [-1] * width
+    used      = [False] * width
+
+    # Grow a tree of tight edges from row until it reaches a free column
+    cur_row = row
+    cur_col = -1
+    while True:
+        cost_row = cost[cur_row]
+        u_row = u[cur_row]
+        delta = maxint
+        next_col = -1
+
+        # Among equally cheap columns a free one is taken, which ends the
+        # search at once rather than after a pass for each tied column
+        for j in xrange(width):
+            if not used[j]:
+                slack = cost_row[j] - u_row - v[j]
+                if slack < min_slack[j]:
+                    min_slack[j] = slack
+                    way[j] = cur_col
+                if min_slack[j] < delta or (min_slack[j] == delta and col_row[j] == -1):
+                    delta = min_slack[j]
+                    next_col = j
+
+        # Shift the potentials so the cheapest edge out of the tree becomes tight
+        u[row] += delta
+        for j in xrange(width):
+            if used[j]:
+                u[col_row[j]] += delta
+                v[j] -= delta
+            else:
+                min_slack[j] -= delta
+
+        used[next_col] = True
+        cur_col = next_col
+        if col_row[cur_col] == -1:
+            break
+        cur_row = col_row[cur_col]
+
+    # Flip the assignment along the path back to row
+    length = 0
+    while True:
+        prev_col = way[cur_col]
+        if prev_col == -1:
+            assigned = row
+        else:
+            assigned = col_row[prev_col]
+
+        col_row[cur_col] = assigned
+        row_col[assigned] = cur_col
+        length += 1
+
+        if prev_col == -1:
+            return length
+        cur_col = prev_col
@@ -1,49 +1,44 @@
 #!/usr/bin/env python2.6
 '''Logs the state of the imperative hungarian algorithm for use in test cases
 
+The matcher state is recorded as deltas by the underlying Tracer and
+only rebuilt into full snapshots when write is called.
+
 Usage: 
 Instantiate with the directory where the log files should be stored
-Call log to record the matcher state
+(and optionally keep only every sample-th call of each function)
+Pass it to the matcher, which records its state as it runs
 Call write to output all logged values to file
 
 Created on May 8, 2010
 @author: Andrew Metcalf
 '''
 
+import tracer #@UnresolvedImport
 import pickle
-import copy
 
-class Logger(object):
+class Logger(tracer.Tracer):
     
-    def __init__(self,log_path):
-        self._inputs = {}
-        self._outputs = {}
+    def __init__(self,log_path,sample = 1):
+        tracer.Tracer.__init__(self, sample)
         self._log_path = log_path
     
-    def log(self,input,function_name,matcher):
-        """Record the matcher state
-        
-        Args:
-            input: boolean specifying whether this is the input or output of a function
-            function_name: name of the calling function 
-            matcher: the matcher object
-        """
-        
-        if input:
-            record = self._inputs
-        else:
-            record = self._outputs
+    def write(self):
+        """Rebuild the logged states and pickle them, one file per function"""
+        inputs = {}
+        outputs = {}
         
-        if not record.has_key(function_name):
-            record[function_name] = []
+        for input,name,state in self.snapshots():
+            if input:
+                record = inputs
+            else:
+                record = outputs
+            record.setdefault(name, []).append(state)
         
-        record[function_name].append(self._get_state(matcher))
-    
-    def write(self):
-        for name,data in self._inputs.iteritems():
+        for name,data in inputs.iteritems():
             pickle.dump(data, self._get_file(True,name))
             
-        for name,data in self._outputs.iteritems():
+        for name,data in outputs.iteritems():
             pickle.dump(data, self._get_file(False,name))    
     
     def _get_file(self,input, function_name):
@@ -53,22 +48,3 @@ class Logger(object):
             mod = "output"
             
         return open(self._log_path+mod+"_"+function_name+".log","w")
-            
-    
-    def _get_state(self, matcher):
-        new_matrix = []
-        
-        for row,star_row,prime_row in zip(matcher.get_matrix(),matcher._starred,matcher._primed):
-            new_row = []
-            for item,star,prime in zip(row,star_row,prime_row):
-                if(star):
-                    mark = 1
-                elif(prime):
-                    mark = 2
-                else:
-                    mark = 0
-                new_row.append([item,mark])
-                
-            new_matrix.append(new_row)   
-        
-        return [new_matrix,copy.deepcopy(matcher._row_covered), copy.deepcopy(matcher._col_covered),[matcher._z_row, matcher._z_col],[matcher._products,matcher._customers]]
\ No newline at end of file
@@ -10,23 +10,25 @@ Created on May 2, 2010
 
 '''
 
+import name_cache #@UnresolvedImport
+import length_table #@UnresolvedImport
+
+# Every score is a letter count multiplied by 1, 1.5 or 2.25, so multiplying
+# it by SCALE always gives an exact integer
+SCALE = 4
+
 class Name(object):
     """Base classs for product and customer names
     
     Defines logic for determining greatest common factors
+    
+    The features of each name come from the process-wide name_cache
     """
     
     def __init__(self, name):
         self._name = name
-        self._factors = self._find_factors(len(name))
-        
-    def _find_factors(self, number):
-        factors = set()
-        for i in range(2,number+1):
-            if(number % i == 0):
-                factors.add(i)
-        
-        return factors
+        # Each name gets its own set, as callers may change it
+        self._factors = set(name_cache.name_features(name)[1])
     
     def get_factors(self):
         return self._factors
@@ -52,8 +54,8 @@ class Customer(Name):
     def __init__(self, name):
         Name.__init__(self,name)
         
-        self._vowels = self._count_letters(name, self.VOWELS)
-        self._consonants = self._count_letters(name, self.CONSONANTS)
+        # A second lookup is a cache hit
+        (length, factors, self._vowels, self._consonants) = name_cache.name_features(name)
 
     def get_suitability(self, product):
         """Determines the suitability of a product for the customer
@@ -70,21 +72,8 @@ class Customer(Name):
         Returns: A suitability score (float)
         """
         
-        if product.is_even():
-            score = self._vowels * 1.5
-        else:
-            score = self._consonants
-        
-        if self.has_common_factor(product.get_factors()):
-            score *= 1.5 
-        
-        return score
-
-    def _count_letters(self,name, letters):
-        low_name = name.lower()
-        count = 0
-        
-        for letter in letters:
-            count = count + low_name.count(letter)
+        # The parity and common factor branches are looked up from the lengths
+        branch = length_table.branch(len(self._name), len(product._name))
         
-        return count
+        return (self._vowels * 1.5, self._consonants, 
+                self._vowels * 2.25, self._consonants * 1.5)[branch]
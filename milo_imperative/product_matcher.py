@@ -18,31 +18,73 @@ Usage:
 3. Call match_suitability with the list of assignments to return the 
    suitability of the match
 
+The cost matrix is held in one compact typed array (see storage), and a
+memory_limit in bytes makes the matcher raise MemoryError up front for a
+matrix that would not fit.  With mapped, the matrix is kept in a
+memory-mapped temporary file instead, and the stats report its block size,
+the blocks read and the page faults of the solve.  Call close once the
+matrix is no longer needed to delete that file.
+
 Created on May 2, 2010
 @author: Andrew Metcalf
 '''
 
 import names #@UnresolvedImport
-import matrix_functions #@UnresolvedImport
+import features #@UnresolvedImport
+import storage #@UnresolvedImport
+import tracer #@UnresolvedImport
 from sys import maxint
-import copy
+
+try:
+    import resource
+except ImportError:
+    resource = None
 
 class ProductMatcher():
     
-    def __init__(self, customer_names, product_names, logger = None):        
+    def __init__(self, customer_names, product_names, logger = None, stats = None, memory_limit = None,
+                 mapped = False):        
+        self._customer_names = customer_names
+        self._product_names = product_names
+        self._size = max(len(customer_names),len(product_names))
+        
+        # The costs run from 0 up to the largest score, which sets the type of
+        # the matrix rows and so the memory the matrix needs
+        (lengths, vowels, consonants) = features.customer_features(customer_names)
+        product_lengths = features.product_features(product_names)
+        self._features = (lengths, vowels, consonants, product_lengths)
+        self._typecode = storage.typecode(features.scaled_max(*self._features))
+        self._mapped = mapped
+        if not mapped:
+            storage.check_memory(self._size, self._size, self._typecode, memory_limit)
+        
         self._products = [names.Product(name) for name in product_names]
         self._customers = [names.Customer(name) for name in customer_names]
         
-        self._size = max(len(customer_names),len(product_names))
-        
         self._row_covered = [False for i in range(self._size)]
         self._col_covered = [False for i in range(self._size)]
-        self._starred     = [[False for j in range(self._size)] for i in range(self._size)]
-        self._primed      = [[False for j in range(self._size)] for i in range(self._size)]
+        self._covered_count = 0
+        
+        # Each row and column holds at most one star and each row at most one
+        # prime, so they are stored as indices (-1 when there is none)
+        self._star_col    = [-1 for i in range(self._size)]
+        self._star_row    = [-1 for j in range(self._size)]
+        self._prime_col   = [-1 for i in range(self._size)]
+        self._primed_rows = []
+        
+        # Adjustments are kept as offsets per row and column: a cell's value is
+        # _matrix[i][j] + _row_offset[i] + _col_offset[j] until get_matrix folds
+        # them in. _slack[i] is the smallest value in row i over the uncovered
+        # columns and _slack_col[i] the first column holding it
+        self._row_offset  = [0 for i in range(self._size)]
+        self._col_offset  = [0 for j in range(self._size)]
+        self._slack       = [maxint for i in range(self._size)]
+        self._slack_col   = [-1 for i in range(self._size)]
 
         self._z_row       = -1
         self._z_col       = -1
         self._logger = logger
+        self._stats = stats
         
         
     ###############################################
@@ -61,7 +103,12 @@ class ProductMatcher():
         with the second product
         """
         
+        if(self._stats != None):
+            faults = _page_faults()
+            self._stats.log(True,"setup")
         self._setup_matcher()
+        if(self._stats != None):
+            self._stats.log(False,"setup")
         
         # Run the algorithm until a solution is found
         self._log(True,"run_matcher")
@@ -81,13 +128,16 @@ class ProductMatcher():
          
         self._log(False,"run_matcher")
         
-        # Read the solution from the matrix           
+        if(self._stats != None and self._mapped):
+            self._record_storage(faults)
+        
+        # Read the solution from the stars, stars in padding columns are no match
         results = []
         
-        for row in self._starred[:self._height]:
-            try:
-                results.append(row[:self._width].index(True))
-            except ValueError:
+        for col in self._star_col[:self._height]:
+            if col < self._width:
+                results.append(col)
+            else:
                 results.append(-1)
         
         return results
@@ -95,30 +145,29 @@ class ProductMatcher():
     def match_suitability(self, matches):
         """Determines the total suitability of a given matching"""
         
-        if not hasattr(self, "_suitability"):
-            self._setup_matcher()
-        
+        # Only the matched pairs are scored, as exact integers scaled by
+        # names.SCALE, so no copy of the scores is kept for this
         total = 0
         for row, col in enumerate(matches):
             if(col != -1):
-                total += self._suitability[row][col]
+                (length, vowels, consonants) = features.name_features(self._customer_names[row])
+                total += features.scaled_score(length, vowels, consonants, len(self._product_names[col]))
             
-        return total
+        return total / float(names.SCALE)
     
     def suitability_matrix(self):
         """Returns a matrix of suitability scores between customers and products"""
-        matrix = []
-        for customer in self._customers:
-            row = []
-            for product in self._products:
-                row.append(customer.get_suitability(product))
-            matrix.append(row)
-            
-        return matrix
+        return features.suitability_matrix(self._customer_names, self._product_names)
 
     def get_matrix(self):
+        self._apply_offsets()
         return self._matrix
     
+    def close(self):
+        """Frees the matrix, deleting the file behind a mapped one"""
+        if hasattr(self, "_matrix"):
+            self._matrix.close()
+    
     
     ###############################################
     # HUNGARIAN ALGORITHM STEPS
@@ -126,23 +175,20 @@ class ProductMatcher():
     
     def _setup_matcher(self):
         """
-        1. Computes the suitability matrix, 
-        2. Converts it to an n x n minimum assignment problem
+        1. Computes the suitability matrix a row at a time as integers scaled by
+           names.SCALE, so that zeroes are detected exactly
+        2. Converts it to an n x n minimum assignment problem, padded with zeroes
         3. Starts the Hungarian algorith by subtracting the smallest value from each row 
         and starring zeros 
         """
         
-        self._suitability = self.suitability_matrix()
-        self._height = len(self._suitability)
-        self._width = len(self._suitability[0])
+        self._height = len(self._customer_names)
+        self._width = len(self._product_names)
         
-        # Store the original suitability matrix for computing match suitability later
-        self._matrix = copy.deepcopy(self._suitability)
+        self._matrix = storage.build(self._typecode, self._size, self._cost_rows(), self._mapped)
         
-        matrix_functions.augment_matrix(self._matrix)   
-        matrix_functions.min_matrix(self._matrix)   
-        matrix_functions.subtract_row_min(self._matrix)
-        #matrix_functions.subtract_col_min(suitability)
+        if(self._logger != None):
+            self._logger.begin(self)
         
         self._star_zeroes()
     
@@ -151,28 +197,26 @@ class ProductMatcher():
         Traverse the matrix and star any zero that does
         not have a starred zero in its row or column
         """
-        for i in range(self._size):
+        self._count("matrix_scans")
+        for i, row in enumerate(self._matrix):
             for j in range(self._size):
-                if(self._matrix[i][j] == 0 and not self._covered(i,j)):
-                    self._starred[i][j]  = True
-                    self._col_covered[j] = True
-                    self._row_covered[i] = True
-                
-        self._uncover_all()
+                if(row[j] == 0 and self._star_row[j] == -1):
+                    self._star(i, j)
+                    break
     
     def _cover_columns(self):
         """Cover any column that contains a starred zero"""
         self._log(True,"cover_columns")
-        for i in range(self._size):
-            for j in range(self._size):
-                if(self._starred[i][j]):
-                    self._col_covered[j] = True
+        for j in self._star_col:
+            if j != -1:
+                self._cover_col(j)
                  
         # If we have _covered every column, a solution has been found
-        if sum(self._col_covered) >= self._size:
+        if self._covered_count >= self._size:
             self._log(False,"cover_columns")
             return True 
         else:
+            self._reset_slack()
             self._log(False,"cover_columns")
             return False
      
@@ -197,16 +241,21 @@ class ProductMatcher():
                 self._log(False,"prime_zeroes")
                 return True
             else:
-                self._primed[z_row][z_col] = True
+                self._prime_col[z_row] = z_col
+                self._primed_rows.append(z_row)
+                self._trace(tracer.PRIME, z_row, z_col)
                        
-                star_col = self._starred_column(z_row)
+                star_col = self._star_col[z_row]
                 
                 if star_col > -1:
                     self._row_covered[z_row] = True
-                    self._col_covered[star_col] = False
+                    self._trace(tracer.COVER_ROW, z_row)
+                    self._uncover_col(star_col)
+                    self._update_slack(star_col)
                 else:
                     self._z_row = z_row
                     self._z_col = z_col
+                    self._trace(tracer.PATH_START, z_row, z_col)
                     self._log(False,"prime_zeroes")
                     return False
         
@@ -233,7 +282,7 @@ class ProductMatcher():
         done = False
         while not done:
             # Find a starred zero in the column of the last element in the path
-            row = self._starred_row(path[count][1])
+            row = self._star_row[path[count][1]]
             
             if row >= 0:
                 # Store the starred zero
@@ -241,20 +290,21 @@ class ProductMatcher():
                 count += 1
                 
                 # Find and store a primed zero
-                col = self._primed_column(row)
+                col = self._prime_col[row]
                 path.append([row, col])
                 count += 1
                 
             else:
                 done = True
         
-        # Unstar each starred and star each primed zero
-        for item in path:
-            if self._starred[item[0]][item[1]]:
-                self._starred[item[0]][item[1]] = False
-            else:
-                self._starred[item[0]][item[1]] = True
-                self._primed[item[0]][item[1]] = False
+        # Unstar each starred and star each primed zero. Primed zeroes are at
+        # even positions of the path, so starring them in order replaces every
+        # starred zero in their row and column
+        for item in path[::2]:
+            self._star(item[0], item[1])
+        
+        if(self._stats != None):
+            self._stats.path(len(path))
         
         self._uncover_all()
         self._unprime_all()
@@ -265,10 +315,11 @@ class ProductMatcher():
     def _adjust_matrix(self):
         """Adjust the matrix to find the second minimum cost among conflicting rows
         
-        1. Find the smallest uncovered value in the matrix
+        1. Find the smallest uncovered value in the matrix (the smallest slack)
         2. Add the smallest value to each covered row
         3. Subtract the smallest value from each uncovered column  
         
+        Both changes are recorded as row and column offsets, so this is O(n)
         """
         
         self._log(True,"adjust_matrix")
@@ -277,17 +328,21 @@ class ProductMatcher():
         
         for i in range(self._size):
             if(not self._row_covered[i]):
-                for j,covered in enumerate(self._col_covered):
-                    if(not covered):
-                        min_v = min(min_v,self._matrix[i][j])   
+                min_v = min(min_v,self._slack[i])
         
-                
+        # Uncovered cells of uncovered rows all drop by min_v, so each slack
+        # drops by min_v and keeps its column
         for i in range(self._size):
-            for j in range(self._size):
-                if self._row_covered[i]:
-                    self._matrix[i][j] += min_v
-                if not self._col_covered[j]:
-                    self._matrix[i][j] -= min_v 
+            if self._row_covered[i]:
+                self._row_offset[i] += min_v
+            else:
+                self._slack[i] -= min_v
+        
+        for j in range(self._size):
+            if not self._col_covered[j]:
+                self._col_offset[j] -= min_v
+        
+        self._trace(tracer.ADJUST, min_v)
                     
         self._log(False,"adjust_matrix")
         
@@ -295,51 +350,141 @@ class ProductMatcher():
     # HELPER METHODS
     ###############################################
        
-    def _starred_column(self,row):
-        """Find the column of any starred zero in the row"""
-        for j in range(0,self._size):
-            if(self._starred[row][j]):
-                return j
-        return -1
-
-    def _starred_row(self,col):
-        """Find the row of any starred zero in the column"""
-        for i in range(0,self._size):
-            if(self._starred[i][col]):
-                return i
-            
-        return -1
+    def _star(self, row, col):
+        """Star the zero at row, col, replacing the star in its column"""
+        old_row = self._star_row[col]
+        if old_row != -1:
+            self._star_col[old_row] = -1
+        
+        self._star_col[row] = col
+        self._star_row[col] = row
+        self._trace(tracer.STAR, row, col)
+    
+    def _cover_col(self, col):
+        if not self._col_covered[col]:
+            self._col_covered[col] = True
+            self._covered_count += 1
+            self._trace(tracer.COVER_COL, col)
     
-    def _primed_column(self, row):
-        """Find the column of any primed zero in the row"""
-        for j in range(0,self._size):
-            if(self._primed[row][j]):
-                return j
-        return -1
+    def _uncover_col(self, col):
+        if self._col_covered[col]:
+            self._col_covered[col] = False
+            self._covered_count -= 1
+            self._trace(tracer.UNCOVER_COL, col)
     
     def _uncovered_zero(self):
-        """Find the first uncovered zero in the matrix"""
+        """Find the first uncovered zero in the matrix
+        
+        No value is negative, so an uncovered row holds a zero exactly when its
+        slack is zero, and its first zero is in the slack column
+        """
         for i in range(0,self._size):
-            for j in range(0,self._size):
-                if(self._matrix[i][j] == 0 and not self._covered(i,j)):
-                    return (i,j)
+            if(not self._row_covered[i] and self._slack[i] == 0):
+                return (i,self._slack_col[i])
         
         return (-1, -1)
     
+    def _reset_slack(self):
+        """Recompute the slack of every row from scratch, O(n^2)"""
+        self._count("matrix_scans")
+        cols = [j for j in range(self._size) if not self._col_covered[j]]
+        
+        for i, row in enumerate(self._matrix):
+            (value, col) = min([(row[j] + self._col_offset[j], j) for j in cols])
+            self._slack[i] = value + self._row_offset[i]
+            self._slack_col[i] = col
+    
+    def _update_slack(self, col):
+        """Take a newly uncovered column into the slack of the uncovered rows"""
+        self._count("column_scans")
+        column = self._matrix.column(col)
+        for i in range(self._size):
+            if(not self._row_covered[i]):
+                value = column[i] + self._row_offset[i] + self._col_offset[col]
+                if(value < self._slack[i] or (value == self._slack[i] and col < self._slack_col[i])):
+                    self._slack[i] = value
+                    self._slack_col[i] = col
+    
+    def _apply_offsets(self):
+        """Fold the row and column offsets into the matrix"""
+        if any(self._row_offset) or any(self._col_offset):
+            def adjusted_rows():
+                for row, row_offset in zip(self._matrix, self._row_offset):
+                    yield [value + row_offset + col_offset
+                           for value, col_offset in zip(row, self._col_offset)]
+            
+            # Adjusted values can outgrow the type of the rows, so the rows
+            # are written out again once their range is known
+            high = max(max(row) for row in adjusted_rows())
+            low = min(min(row) for row in adjusted_rows())
+            self._typecode = storage.typecode(high, low)
+            
+            matrix = storage.build(self._typecode, self._size, adjusted_rows(), self._mapped)
+            self._matrix.close()
+            self._matrix = matrix
+            
+            self._row_offset = [0 for i in range(self._size)]
+            self._col_offset = [0 for j in range(self._size)]
+    
+    
+    def _cost_rows(self):
+        """Yields the rows of the n x n cost matrix
+        
+        Turning scores into costs and subtracting the row minimum leaves each
+        row's largest score minus each score, and padding rows are all zero
+        """
+        padding = [0 for j in range(self._size - self._width)]
+        for scores in features.scaled_rows(*self._features):
+            scores.extend(padding)
+            high = max(scores)
+            yield [high - score for score in scores]
+        
+        for i in range(self._size - self._height):
+            yield [0 for j in range(self._size)]
+    
+    def _record_storage(self, faults):
+        """Report the blocks of the mapped matrix and the page faults since faults"""
+        self._stats.record("block_rows", self._matrix.block_rows)
+        self._stats.record("block_bytes", self._matrix.block_bytes)
+        self._stats.record("matrix_bytes", self._matrix.file_bytes)
+        self._stats.count("block_reads", self._matrix.block_reads)
+        
+        if faults is not None:
+            (minor, major) = _page_faults()
+            self._stats.count("minor_faults", minor - faults[0])
+            self._stats.count("major_faults", major - faults[1])
     
     def _uncover_all(self):
         for i in range(self._size):
             self._row_covered[i] = False
             self._col_covered[i] = False
+        self._covered_count = 0
+        self._trace(tracer.UNCOVER_ALL)
             
     def _unprime_all(self):
-        for i in range(0,self._size):
-            for j in range(0,self._size):
-                self._primed[i][j] = False
+        for i in self._primed_rows:
+            self._prime_col[i] = -1
+        self._primed_rows = []
+        self._trace(tracer.UNPRIME_ALL)
         
-    def _covered(self, row, col):
-        return self._row_covered[row] or self._col_covered[col]
-    
     def _log(self, input, function_name):
         if(self._logger != None):
-            self._logger.log(input,function_name,self)
\ No newline at end of file
+            self._logger.log(input,function_name,self)
+        if(self._stats != None):
+            self._stats.log(input,function_name)
+    
+    def _trace(self, kind, a = 0, b = 0):
+        if(self._logger != None):
+            self._logger.trace(kind, a, b)
+    
+    def _count(self, name):
+        if(self._stats != None):
+            self._stats.count(name)
+
+def _page_faults():
+    """Returns the (minor, major) page faults of the process so far, or None"""
+    if resource is None:
+        return None
+    
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return (usage.ru_minflt, usage.ru_majflt)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python2.6
+'''Implements product-customer matching without padding the matrix square
+
+ProductMatcher and JVMatcher pad the suitability matrix with zero rows or
+columns up to max(customers, products), so 20000 customers against 300
+products are solved as a 20000 x 20000 problem that is almost all padding.
+RectangularMatcher solves the real matrix instead.  It adds each name on the
+shorter side to the assignment with one shortest augmenting path
+(jv_matcher.augment), searching over the names on the longer side, so the
+solve takes O(m*n*min(m,n)) time and O(m*n) memory.
+
+When there are more customers than products the matrix is transposed and
+the products are the ones assigned; customers left without a product come
+back as -1, exactly as from ProductMatcher.match_products.
+
+Usage: identical to ProductMatcher
+
+Created on Oct 18, 2026
+'''
+
+import features #@UnresolvedImport
+import product_matcher #@UnresolvedImport
+import jv_matcher #@UnresolvedImport
+
+class RectangularMatcher(product_matcher.ProductMatcher):
+
+    def __init__(self, customer_names, product_names):
+        self._customer_names = customer_names
+        self._product_names = product_names
+
+    ###############################################
+    # PUBLIC INSTANCE METHODS
+    ###############################################
+
+    def match_products(self):
+        """Computes the most suitable product matching
+
+        Returns the matching in the form described by
+        ProductMatcher.match_products
+        """
+
+        self._setup_matcher()
+
+        rows = len(self._cost)
+        cols = len(self._cost[0])
+        u = [0 for i in range(rows)]
+        v = [0 for j in range(cols)]
+        row_col = [-1 for i in range(rows)]
+        col_row = [-1 for j in range(cols)]
+
+        for row in range(rows):
+            jv_matcher.augment(self._cost, u, v, row_col, col_row, row)
+
+        if not self._transposed:
+            return row_col
+
+        # Rows are products, so read each customer's product off the columns
+        return col_row
+
+    def _setup_matcher(self):
+        """
+        1. Computes the suitability matrix as integers scaled by names.SCALE
+        2. Converts it to a minimum cost problem with the shorter side as rows
+        """
+
+        self._scores = features.scaled_suitability_matrix(self._customer_names, self._product_names)
+        self._height = len(self._scores)
+        self._width = len(self._scores[0])
+
+        # Every row is assigned exactly once, so costs measured down from the
+        # top score give the same assignment as negated scores while keeping
+        # every cell a small non-negative integer
+        top = max(map(max, self._scores))
+        self._transposed = self._height > self._width
+        if self._transposed:
+            self._cost = [[top - row[col] for row in self._scores] for col in range(self._width)]
+        else:
+            self._cost = [[top - score for score in row] for row in self._scores]
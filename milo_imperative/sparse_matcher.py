@@ -0,0 +1,308 @@
+#!/usr/bin/env python2.6
+'''Implements product-customer matching on a sparse candidate graph
+
+For large runs only a handful of products are realistically competitive
+for each customer.  SparseMatcher keeps one product from each of the k
+best ranked name lengths of every customer and the k top ranked customers
+of every product, then solves the assignment
+on that bipartite graph with a sparse shortest augmenting path method.
+Only the O(nk) candidate lists and O(n) duals are stored; no n x n
+matrix is ever built.
+
+The matching is therefore approximate: it is the best one within the
+candidate graph, which need not hold the best matching overall.  On the
+test and benchmark inputs it comes within about 1% of the optimum (see
+SparseMatcherSteps.test_gap); use jv, rectangular or implicit for exact
+results.
+
+If the graph has no matching that covers every customer (or every
+product when there are fewer products than customers), some augmenting
+searches ran out of columns: the rows each reached all compete for too
+few columns.  The graph is then widened, every customer and product
+keeping twice as many candidates and those rows getting candidate edges
+to the columns left free, and the assignment is solved again.  Only when
+that still fails after a few rounds does the matcher fall back to solving
+the whole problem, with the unpadded and matrix-free ImplicitMatcher.
+
+Usage: identical to ProductMatcher, with optional candidates and retries
+arguments giving k and the most widened graphs to try
+
+Created on Oct 18, 2026
+'''
+
+import features #@UnresolvedImport
+import names #@UnresolvedImport
+import implicit_matcher #@UnresolvedImport
+import product_matcher #@UnresolvedImport
+import heapq
+
+DEFAULT_CANDIDATES = 8
+
+# Most times the candidate graph is widened before solving the dense problem
+MAX_RETRIES = 8
+
+class SparseMatcher(product_matcher.ProductMatcher):
+
+    def __init__(self, customer_names, product_names, candidates = DEFAULT_CANDIDATES,
+                 retries = MAX_RETRIES):
+        self._customer_names = customer_names
+        self._product_names = product_names
+        self._candidates = candidates
+        self._retries = retries
+        self._dense_fallback = False
+        self._widened = 0
+
+    ###############################################
+    # PUBLIC INSTANCE METHODS
+    ###############################################
+
+    def match_products(self):
+        """Computes the most suitable product matching
+
+        Returns the matching in the form described by
+        ProductMatcher.match_products
+        """
+
+        self._setup_matcher()
+        self._dense_fallback = False
+        self._widened = 0
+
+        customers = len(self._lengths)
+        products = len(self._product_lengths)
+
+        edges = [{} for i in range(customers)]
+        self._widen(edges, range(customers), range(products), self._candidates)
+        while True:
+            # Customers are the rows unless there are more of them than products
+            reached = []
+            if customers <= products:
+                results = sparse_assignment([row.items() for row in edges], products, reached)
+            else:
+                transposed = [[] for j in range(products)]
+                for i, row in enumerate(edges):
+                    for (j, cost) in row.iteritems():
+                        transposed[j].append((i, cost))
+
+                results = sparse_assignment(transposed, customers, reached)
+                if results is not None:
+                    by_customer = [-1 for i in range(customers)]
+                    for j, i in enumerate(results):
+                        by_customer[i] = j
+                    results = by_customer
+
+            if results is not None or self._widened >= self._retries or not reached:
+                break
+
+            # Every customer and product gets twice the candidates, and the
+            # blocked rows some of the columns left free
+            self._widened += 1
+            candidates = self._candidates << self._widened
+            self._widen(edges, range(customers), range(products), candidates)
+            (rows, free) = reached
+            if customers <= products:
+                self._widen(edges, rows, free, candidates)
+            else:
+                self._widen(edges, free, rows, candidates)
+
+        if results is None:
+            self._dense_fallback = True
+            results = implicit_matcher.ImplicitMatcher(self._customer_names, self._product_names).match_products()
+
+        return results
+
+    def match_suitability(self, matches):
+        """Determines the total suitability of a given matching"""
+
+        if not hasattr(self, "_lengths"):
+            self._setup_matcher()
+
+        total = 0
+        for row, col in enumerate(matches):
+            if(col != -1):
+                total += features.scaled_score(self._lengths[row], self._vowels[row],
+                                               self._consonants[row], self._product_lengths[col])
+
+        return total / float(names.SCALE)
+
+    def used_dense_fallback(self):
+        """True when the last match_products call had to solve the dense problem"""
+        return self._dense_fallback
+
+    def widened(self):
+        """The number of times the last match_products call widened the graph"""
+        return self._widened
+
+    def _widen(self, edges, customers, products, candidates):
+        """Adds the candidate edges between some customers and some products"""
+        subset = candidate_edges([self._lengths[i] for i in customers],
+                                 [self._vowels[i] for i in customers],
+                                 [self._consonants[i] for i in customers],
+                                 [self._product_lengths[j] for j in products], candidates)
+        for i, row in zip(customers, subset):
+            for (j, cost) in row:
+                edges[i][products[j]] = cost
+
+    def _setup_matcher(self):
+        (self._lengths, self._vowels, self._consonants) = \
+            features.customer_features(self._customer_names)
+        self._product_lengths = features.product_features(self._product_names)
+
+###############################################
+# CANDIDATE GRAPH
+###############################################
+
+def candidate_edges(lengths, vowels, consonants, product_lengths, candidates):
+    """Builds the candidate graph between customers and products
+
+    A customer's score only depends on the product name length, so the
+    products of one length are interchangeable.  Each customer therefore
+    keeps one product from each of its k best ranked lengths, taking the
+    products of a length in turn so that the customers who want a length
+    are spread over all of its products.  Each product also keeps the k
+    most suitable customers for its length, and the k customers who lose
+    the least by taking it rather than their best length (both likewise
+    taken in turn), which gives every product at least k edges.  The
+    second kind matter when every product has to be used.
+
+    Returns: A list with a list of (product index, cost) edges per
+        customer, where cost is the negated suitability scaled by names.SCALE
+    """
+
+    by_length = {}
+    for j, length in enumerate(product_lengths):
+        by_length.setdefault(length, []).append(j)
+
+    customer_data = zip(lengths, vowels, consonants)
+    edges = [{} for i in customer_data]
+
+    distinct = by_length.keys()
+    turns = dict((length, 0) for length in distinct)
+    best = []
+    for i, key in enumerate(customer_data):
+        # Equally suitable lengths are ranked in a different order for each customer
+        ranked = sorted([(-features.scaled_score(*(key + (length,))), (position + i) % len(distinct), length)
+                         for position, length in enumerate(distinct)])
+        best.append(-ranked[0][0])
+
+        for (cost, order, length) in ranked[:candidates]:
+            products = by_length[length]
+            edges[i][products[turns[length] % len(products)]] = cost
+            turns[length] += 1
+
+    for length, products in by_length.iteritems():
+        scores = [features.scaled_score(*(key + (length,))) for key in customer_data]
+        for ranked in (sorted(range(len(scores)), key = scores.__getitem__, reverse = True),
+                       sorted(range(len(scores)), key = lambda i: scores[i] - best[i], reverse = True)):
+            for turn, j in enumerate(products):
+                for step in range(min(candidates, len(ranked))):
+                    i = ranked[(step * len(products) + turn) % len(ranked)]
+                    edges[i][j] = -scores[i]
+
+    return [row.items() for row in edges]
+
+###############################################
+# SPARSE SHORTEST AUGMENTING PATH
+###############################################
+
+def sparse_assignment(edges, width, reached = None):
+    """Minimum cost assignment of every row on a sparse graph
+
+    Each row is added along a shortest augmenting path found by Dijkstra
+    over reduced costs, visiting only the edges reachable from it.  Column
+    potentials only decrease, so unassigned columns keep a zero potential
+    and the result is optimal among matchings that cover every row.
+
+    Args:
+        edges: a list of (column, cost) lists, one per row
+        width: the number of columns (at least the number of rows)
+        reached: an optional list, given the rows reached by the searches
+            that failed and the columns left free by the others
+
+    Returns: The column assigned to each row, or None if some row cannot be
+        matched in the graph
+    """
+
+    u = [0 for row in edges]
+    v = [0 for col in range(width)]
+    row_col = [-1 for row in edges]
+    col_row = [-1 for col in range(width)]
+
+    # A row that cannot be matched is left out, so that the rows of every
+    # failed search are found in one pass
+    blocked = set()
+    for row in range(len(edges)):
+        if edges[row]:
+            u[row] = min([cost - v[col] for (col, cost) in edges[row]])
+            rows = _sparse_augment(edges, u, v, row_col, col_row, row)
+        else:
+            rows = [row]
+
+        if rows is not None:
+            blocked.update(rows)
+
+    if not blocked:
+        return row_col
+
+    if reached is not None:
+        reached[:] = [sorted(blocked), [col for col in range(width) if col_row[col] == -1]]
+    return None
+
+def _sparse_augment(edges, u, v, row_col, col_row, row):
+    """Adds row to the assignment
+
+    Returns None, or the rows reached when no augmenting path exists
+    """
+    dist = {}
+    row_dist = {row : 0}
+    way = {}
+    settled = []
+    heap = []
+
+    # Expand a row: push every column it reaches
+    def expand(cur_row, cur_dist):
+        base = cur_dist - u[cur_row]
+        for (col, cost) in edges[cur_row]:
+            col_dist = base + cost - v[col]
+            if col not in dist or col_dist < dist[col]:
+                dist[col] = col_dist
+                way[col] = cur_row
+                heapq.heappush(heap, (col_dist, col))
+
+    expand(row, 0)
+    done = set()
+    end_col = -1
+    while heap:
+        (col_dist, col) = heapq.heappop(heap)
+        if col in done:
+            continue
+        done.add(col)
+
+        if col_row[col] == -1:
+            end_col = col
+            break
+
+        settled.append(col)
+        next_row = col_row[col]
+        row_dist[next_row] = col_dist
+        expand(next_row, col_dist)
+
+    if end_col == -1:
+        return row_dist.keys()
+
+    # Shift the potentials so that the path becomes tight
+    final = dist[end_col]
+    for cur_row, cur_dist in row_dist.iteritems():
+        u[cur_row] += final - cur_dist
+    for col in settled:
+        v[col] -= final - dist[col]
+
+    # Flip the assignment along the path
+    col = end_col
+    while True:
+        cur_row = way[col]
+        prev_col = row_col[cur_row]
+        row_col[cur_row] = col
+        col_row[col] = cur_row
+        if cur_row == row:
+            return None
+        col = prev_col
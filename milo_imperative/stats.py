@@ -0,0 +1,78 @@
+#!/usr/bin/env python2.6
+'''Collects per-step counts and timings from the imperative hungarian algorithm
+
+The matcher reports the input and output of each step just as it does to its
+Logger, so Stats times every step from those two calls.  It also counts full
+passes over the matrix and records the length of each augmenting path.  A
+matcher without a Stats object only pays for one comparison per step.
+Values that are not summed, such as the block size of a memory-mapped
+matrix, are kept as they are recorded.
+
+Usage:
+    stats = Stats()
+    ProductMatcher(customer_names, product_names, stats = stats).match_products()
+    print stats.report()
+
+Created on Oct 18, 2026
+'''
+
+import time
+
+class Stats(object):
+
+    def __init__(self):
+        self.calls = {}
+        self.seconds = {}
+        self.counters = {}
+        self.values = {}
+        self.path_lengths = []
+        self._started = {}
+
+    ###############################################
+    # PUBLIC INSTANCE METHODS
+    ###############################################
+
+    def log(self, input, function_name):
+        """Record the input or output of a step
+
+        Args:
+            input: boolean specifying whether this is the input or output of a function
+            function_name: name of the calling function
+        """
+        if input:
+            self._started[function_name] = time.time()
+        else:
+            elapsed = time.time() - self._started.pop(function_name)
+            self.calls[function_name] = self.calls.get(function_name, 0) + 1
+            self.seconds[function_name] = self.seconds.get(function_name, 0.0) + elapsed
+
+    def count(self, name, amount = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record(self, name, value):
+        """Record a value that is reported as is rather than summed"""
+        self.values[name] = value
+
+    def path(self, length):
+        """Record an augmenting path of length zeroes"""
+        self.path_lengths.append(length)
+
+    def report(self):
+        """Returns the statistics as printable lines of text"""
+        lines = ["%-16s %10s %12s" % ("step", "calls", "seconds")]
+        for name in sorted(self.calls):
+            lines.append("%-16s %10d %12.6f" % (name, self.calls[name], self.seconds[name]))
+
+        lines.append("")
+        for name in sorted(self.counters):
+            lines.append("%-16s %10d" % (name, self.counters[name]))
+
+        for name in sorted(self.values):
+            lines.append("%-16s %10s" % (name, self.values[name]))
+
+        if self.path_lengths:
+            lines.append("%-16s %10d" % ("augmentations", len(self.path_lengths)))
+            lines.append("%-16s %10.2f" % ("mean path", sum(self.path_lengths) / float(len(self.path_lengths))))
+            lines.append("%-16s %10d" % ("longest path", max(self.path_lengths)))
+
+        return "\n".join(lines)
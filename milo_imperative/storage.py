@@ -0,0 +1,218 @@
+#!/usr/bin/env python2.6
+'''Stores the cost matrix of the imperative engine in a compact typed array
+
+A matrix of nested lists spends a pointer and a boxed Python number on every
+cell, so an n x n matrix of 5000 names takes several GB.  The costs are
+exact integers between 0 and the largest scaled score, so an ArrayMatrix
+holds them row after row in one array of the smallest integer type covering
+that range instead (16 bits for the usual names, 32 or 64 for longer ones).
+Iterating gives each row as an array and column slices the array with a
+stride, both without a Python loop over the cells.
+
+A memory limit, in bytes, can be set for the whole process (MEMORY_LIMIT)
+or per matcher.  check_memory compares it with the size of a matrix before
+anything is allocated and raises MemoryError with the sizes involved.
+
+A matrix too large for memory can be kept in a MappedMatrix instead: the
+rows are written in blocks of about BLOCK_BYTES to a temporary file, which
+is then memory-mapped, so the operating system's page cache holds as much
+of it as fits.  Passes over every row read the file a block at a time, in
+order, and a column is read with a strided slice of the map.
+
+Usage:
+    code = storage.typecode(largest_value)
+    storage.check_memory(rows, cols, code, limit)
+    matrix = storage.build(code, cols, rows, mapped)
+    for row in matrix: ...
+    column = matrix.column(col)
+
+Created on Oct 18, 2026
+'''
+
+import os
+import mmap
+import tempfile
+from array import array
+
+# Largest matrix allowed, in bytes, when a matcher is not given a limit.
+# None for no limit
+MEMORY_LIMIT = None
+
+# Size of the blocks a mapped matrix is written and read in
+BLOCK_BYTES = 1 << 20
+
+# Directory of the files behind mapped matrices, None for the system default
+TEMP_DIR = None
+
+# Integer types from the smallest, with the largest value each holds
+TYPECODES = [(code, 2 ** (8 * array(code).itemsize - 1) - 1) for code in ("h", "i", "l")]
+
+def typecode(high, low = 0):
+    """Returns the smallest array typecode holding every integer from low to high"""
+    for (code, largest) in TYPECODES:
+        if -largest - 1 <= low and high <= largest:
+            return code
+
+    raise OverflowError("matrix values from %d to %d do not fit in an integer array" % (low, high))
+
+def matrix_bytes(rows, cols, code):
+    """Returns the memory used by the values of an ArrayMatrix"""
+    return rows * cols * array(code).itemsize
+
+def check_memory(rows, cols, code, limit = None):
+    """Raises MemoryError if the matrix would use more than limit bytes
+
+    limit defaults to MEMORY_LIMIT
+    """
+    if limit is None:
+        limit = MEMORY_LIMIT
+    if limit is None:
+        return
+
+    needed = matrix_bytes(rows, cols, code)
+    if needed > limit:
+        raise MemoryError("a %d x %d matrix of %d byte costs needs about %.1f MB, over the limit of %.1f MB"
+                          % (rows, cols, array(code).itemsize, needed / 1048576.0, limit / 1048576.0))
+
+def build(code, cols, rows, mapped = False):
+    """Returns an ArrayMatrix, or a MappedMatrix if mapped, of the given rows
+
+    rows may be any iterable of rows of cols integers
+    """
+    if mapped:
+        return MappedMatrix(code, cols, rows)
+
+    return ArrayMatrix(code, cols, rows)
+
+class ArrayMatrix(object):
+    """A matrix held in memory as one array, a row after another"""
+
+    mapped = False
+
+    def __init__(self, code, cols, rows):
+        self.typecode = code
+        self.cols = cols
+        self.rows = 0
+        self._values = array(code)
+        for row in rows:
+            self._values.extend(row)
+            self.rows += 1
+
+    def column(self, col):
+        return self._values[col::self.cols]
+
+    def close(self):
+        pass
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.rows
+        if not 0 <= index < self.rows:
+            raise IndexError("matrix row out of range")
+
+        return self._values[index * self.cols:(index + 1) * self.cols]
+
+    def __iter__(self):
+        for start in range(0, self.rows * self.cols, self.cols):
+            yield self._values[start:start + self.cols]
+
+class MappedMatrix(object):
+    """A matrix of typed rows kept in a memory-mapped temporary file
+
+    Indexing a row reads that row and iterating reads block_rows rows at a
+    time.  The blocks read are counted so that they can be reported next to
+    the page faults of a solve
+    """
+
+    mapped = True
+
+    def __init__(self, code, cols, rows, block_bytes = None, directory = None):
+        self.typecode = code
+        self.cols = cols
+        self.itemsize = array(code).itemsize
+        self.row_bytes = cols * self.itemsize
+        self.block_rows = max(1, (block_bytes or BLOCK_BYTES) // max(self.row_bytes, 1))
+        self.block_bytes = self.block_rows * self.row_bytes
+
+        self.block_reads = 0
+
+        self._map = None
+        self._file = None
+        (handle, self.path) = tempfile.mkstemp(".matrix", "milo", directory or TEMP_DIR)
+        self._file = os.fdopen(handle, "w+b")
+
+        try:
+            self.rows = self._write(rows)
+            self.file_bytes = self.rows * self.row_bytes
+            if self.file_bytes:
+                self._map = mmap.mmap(self._file.fileno(), self.file_bytes)
+        except:
+            self.close()
+            raise
+
+    ###############################################
+    # PUBLIC INSTANCE METHODS
+    ###############################################
+
+    def column(self, col):
+        """Returns the values of column col as an array"""
+        # Each byte of the values is sliced out of every row at once
+        values = bytearray(self.rows * self.itemsize)
+        offset = col * self.itemsize
+        for byte in range(self.itemsize):
+            values[byte::self.itemsize] = self._map[offset + byte:self.file_bytes:self.row_bytes]
+
+        return array(self.typecode, str(values))
+
+    def close(self):
+        """Unmaps and deletes the file behind the matrix"""
+        if self._file is None:
+            return
+
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+        self._file = None
+        os.remove(self.path)
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.rows
+        if not 0 <= index < self.rows:
+            raise IndexError("matrix row out of range")
+
+        start = index * self.row_bytes
+        return array(self.typecode, self._map[start:start + self.row_bytes])
+
+    def __iter__(self):
+        for start in range(0, self.rows, self.block_rows):
+            self.block_reads += 1
+            count = min(self.block_rows, self.rows - start)
+            block = array(self.typecode, self._map[start * self.row_bytes:(start + count) * self.row_bytes])
+            for i in range(count):
+                yield block[i * self.cols:(i + 1) * self.cols]
+
+    def __del__(self):
+        self.close()
+
+    def _write(self, rows):
+        """Writes the rows to the file a block at a time, returning their count"""
+        count = 0
+        block = array(self.typecode)
+        for row in rows:
+            block.extend(row)
+            count += 1
+            if count % self.block_rows == 0:
+                block.tofile(self._file)
+                block = array(self.typecode)
+
+        block.tofile(self._file)
+        self._file.flush()
+        return count
@@ -0,0 +1,209 @@
+#!/usr/bin/env python2.6
+'''Traces the imperative hungarian algorithm as compact binary deltas
+
+Rather than copying the whole matrix at every logged step, the matcher
+reports each change as it makes it: a zero starred or primed, a row or column
+covered or uncovered, the amount of a matrix adjustment.  Each event is three
+integers appended to a preallocated array, and the matrix itself is stored
+once per run, right after setup.  Full snapshots of the matcher state are
+rebuilt from the events only when they are asked for.
+
+Usage:
+    tracer = Tracer(sample = 10)       # keep every 10th call of each step
+    ProductMatcher(customer_names, product_names, tracer).match_products()
+    for (input, function_name, state) in tracer.snapshots():
+        ...
+
+Created on Oct 18, 2026
+'''
+
+from array import array
+from itertools import chain
+
+# Event kinds
+RUN         = 0
+CHECKPOINT  = 1
+STAR        = 2
+PRIME       = 3
+COVER_ROW   = 4
+COVER_COL   = 5
+UNCOVER_COL = 6
+UNCOVER_ALL = 7
+UNPRIME_ALL = 8
+ADJUST      = 9
+PATH_START  = 10
+
+class Tracer(object):
+
+    def __init__(self, sample = 1, capacity = 4096):
+        """
+        Args:
+            sample: keep the checkpoints of every sample-th call of each function
+            capacity: number of events to allocate room for up front
+        """
+        self._sample = sample
+        self._events = array('l', [0]) * (3 * capacity)
+        self._length = 0
+
+        self._runs = []
+        self._names = []
+        self._name_ids = {}
+        self._calls = {}
+        self._kept = {}
+
+    ###############################################
+    # PUBLIC INSTANCE METHODS
+    ###############################################
+
+    def begin(self, matcher):
+        """Record the matrix of a matcher that has just been set up"""
+        self._runs.append((matcher._size, array('l', chain.from_iterable(matcher._matrix)),
+                           matcher._products, matcher._customers))
+        self.trace(RUN, len(self._runs) - 1)
+
+    def trace(self, kind, a = 0, b = 0):
+        """Record an event, doubling the buffer when it is full"""
+        events = self._events
+        pos = self._length
+        if pos == len(events):
+            events.extend(events)
+
+        events[pos] = kind
+        events[pos + 1] = a
+        events[pos + 2] = b
+        self._length = pos + 3
+
+    def log(self, input, function_name, matcher):
+        """Record a checkpoint at the input or output of a matcher function
+
+        Matches the Logger interface.  When sampling, the output of a call is
+        kept exactly when its input was
+        """
+        if input:
+            calls = self._calls.get(function_name, 0)
+            self._calls[function_name] = calls + 1
+            self._kept[function_name] = calls % self._sample == 0
+
+        if self._kept.get(function_name, True):
+            self.trace(CHECKPOINT, 2 * self._name_id(function_name) + int(input))
+
+    def snapshots(self):
+        """Rebuild the matcher state at every recorded checkpoint
+
+        Returns a list of (input, function_name, state) in the order they were
+        logged, with state in the form returned by snapshot
+        """
+        results = []
+        events = self._events
+        replay = None
+
+        for pos in xrange(0, self._length, 3):
+            (kind, a, b) = events[pos:pos + 3]
+            if kind == RUN:
+                replay = _Replay(*self._runs[a])
+            elif kind == CHECKPOINT:
+                results.append((a % 2 == 1, self._names[a // 2], replay.state()))
+            else:
+                replay.apply(kind, a, b)
+
+        return results
+
+    def _name_id(self, function_name):
+        if function_name not in self._name_ids:
+            self._name_ids[function_name] = len(self._names)
+            self._names.append(function_name)
+        return self._name_ids[function_name]
+
+def snapshot(matcher):
+    """Returns the full state of a live matcher, folding in its offsets
+
+    [matrix of [value, mark] (mark 1 for a star, 2 for a prime), row covers,
+    column covers, [z_row, z_col], [products, customers]]
+    """
+    return _state(matcher.get_matrix(), matcher._star_col, matcher._prime_col,
+                  matcher._row_covered, matcher._col_covered,
+                  matcher._z_row, matcher._z_col, matcher._products, matcher._customers)
+
+###############################################
+# REPLAY
+###############################################
+
+class _Replay(object):
+    """Applies the events of one run to a copy of its matrix
+
+    Like the matcher, adjustments are kept as row and column offsets and only
+    folded into the matrix when a state is taken
+    """
+
+    def __init__(self, size, values, products, customers):
+        self._size = size
+        self._matrix = [values[i * size:(i + 1) * size].tolist() for i in range(size)]
+        self._products = products
+        self._customers = customers
+
+        self._row_covered = [False for i in range(size)]
+        self._col_covered = [False for j in range(size)]
+        self._star_col = [-1 for i in range(size)]
+        self._star_row = [-1 for j in range(size)]
+        self._prime_col = [-1 for i in range(size)]
+        self._z_row = -1
+        self._z_col = -1
+
+        self._row_offset = [0 for i in range(size)]
+        self._col_offset = [0 for j in range(size)]
+
+    def apply(self, kind, a, b):
+        if kind == STAR:
+            old_row = self._star_row[b]
+            if old_row != -1:
+                self._star_col[old_row] = -1
+            self._star_col[a] = b
+            self._star_row[b] = a
+        elif kind == PRIME:
+            self._prime_col[a] = b
+        elif kind == COVER_ROW:
+            self._row_covered[a] = True
+        elif kind == COVER_COL:
+            self._col_covered[a] = True
+        elif kind == UNCOVER_COL:
+            self._col_covered[a] = False
+        elif kind == UNCOVER_ALL:
+            self._row_covered = [False for i in range(self._size)]
+            self._col_covered = [False for j in range(self._size)]
+        elif kind == UNPRIME_ALL:
+            self._prime_col = [-1 for i in range(self._size)]
+        elif kind == ADJUST:
+            self._adjust(a)
+        elif kind == PATH_START:
+            (self._z_row, self._z_col) = (a, b)
+        else:
+            raise ValueError("unknown trace event " + repr(kind))
+
+    def state(self):
+        matrix = [[value + row_offset + col_offset for value, col_offset in zip(row, self._col_offset)]
+                  for row, row_offset in zip(self._matrix, self._row_offset)]
+        return _state(matrix, self._star_col, self._prime_col,
+                      self._row_covered, self._col_covered,
+                      self._z_row, self._z_col, self._products, self._customers)
+
+    def _adjust(self, min_v):
+        """Add min_v to each covered row and subtract it from each uncovered column"""
+        for i in range(self._size):
+            if self._row_covered[i]:
+                self._row_offset[i] += min_v
+            if not self._col_covered[i]:
+                self._col_offset[i] -= min_v
+
+def _state(matrix, star_cols, prime_cols, row_covered, col_covered, z_row, z_col, products, customers):
+    new_matrix = []
+
+    for row, star_col, prime_col in zip(matrix, star_cols, prime_cols):
+        new_row = [[item, 0] for item in row]
+        if prime_col != -1:
+            new_row[prime_col][1] = 2
+        if star_col != -1:
+            new_row[star_col][1] = 1
+
+        new_matrix.append(new_row)
+
+    return [new_matrix, list(row_covered), list(col_covered), [z_row, z_col], [products, customers]]
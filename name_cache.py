@@ -0,0 +1,161 @@
+#!/usr/bin/env python2.6
+'''Caches the features of names across every matcher in the process
+
+A long running process sees the same customer and product names again and
+again, so the features the suitability rules need (the length, its factors,
+the vowel count and the consonant count) are computed once per name and
+kept in a least recently used cache shared by milo_imperative and
+milo_functional.  The cache holds at most max_size names, counts its hits,
+misses and evictions, and may be used from several threads at once.
+
+Usage:
+    (length, factors, vowels, consonants) = name_cache.name_features(name)
+    name_cache.cache_stats()      # {"hits" : ..., "misses" : ..., ...}
+    name_cache.set_max_size(size) # or clear_cache()
+
+Created on Oct 18, 2026
+'''
+
+import threading
+
+VOWELS     = "aeiou"
+CONSONANTS = "bcdfghjklmnpqrstvwxyz"
+
+MAX_SIZE = 65536
+
+class LRUCache(object):
+    """A dictionary of at most max_size entries that drops the least recently used"""
+
+    # Fields of a link in the circular list, from least to most recently used
+    PREV, NEXT, KEY, VALUE = 0, 1, 2, 3
+
+    def __init__(self, max_size = MAX_SIZE):
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self.clear()
+
+    ###############################################
+    # PUBLIC INSTANCE METHODS
+    ###############################################
+
+    def get(self, key, compute):
+        """Returns the value for key, calling compute(key) and storing it on a miss"""
+        with self._lock:
+            link = self._links.get(key)
+            if link is not None:
+                self._hits += 1
+                self._unlink(link)
+                self._append(link)
+                return link[self.VALUE]
+
+            self._misses += 1
+
+        value = compute(key)
+
+        with self._lock:
+            if key not in self._links and self._max_size > 0:
+                if len(self._links) >= self._max_size:
+                    oldest = self._root[self.NEXT]
+                    self._unlink(oldest)
+                    del self._links[oldest[self.KEY]]
+                    self._evictions += 1
+
+                link = [None, None, key, value]
+                self._append(link)
+                self._links[key] = link
+
+        return value
+
+    def set_max_size(self, max_size):
+        """Change the size of the cache, dropping the oldest entries if it shrinks"""
+        with self._lock:
+            self._max_size = max_size
+            while len(self._links) > max(max_size, 0):
+                oldest = self._root[self.NEXT]
+                self._unlink(oldest)
+                del self._links[oldest[self.KEY]]
+                self._evictions += 1
+
+    def clear(self):
+        """Drop every entry and reset the statistics"""
+        with self._lock:
+            self._links = {}
+            self._root = []
+            self._root[:] = [self._root, self._root, None, None]
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def stats(self):
+        """Returns the hits, misses, evictions, size and max_size of the cache"""
+        with self._lock:
+            return {
+                    "hits" : self._hits,
+                    "misses" : self._misses,
+                    "evictions" : self._evictions,
+                    "size" : len(self._links),
+                    "max_size" : self._max_size
+                    }
+
+    def __len__(self):
+        return len(self._links)
+
+    def _append(self, link):
+        last = self._root[self.PREV]
+        link[self.PREV] = last
+        link[self.NEXT] = self._root
+        last[self.NEXT] = link
+        self._root[self.PREV] = link
+
+    def _unlink(self, link):
+        link[self.PREV][self.NEXT] = link[self.NEXT]
+        link[self.NEXT][self.PREV] = link[self.PREV]
+
+###############################################
+# NAME FEATURES
+###############################################
+
+_cache = LRUCache()
+
+def name_features(name):
+    """Returns (length, factors, vowels, consonants) for a name
+
+    factors is the frozenset of the divisors of the length from 2 up, as
+    given by names.Name.get_factors
+    """
+    return _cache.get(name, compute_features)
+
+def compute_features(name):
+    """Computes the features of a name without the cache"""
+    low_name = name.lower()
+
+    if isinstance(low_name, str):
+        vowels     = len(low_name) - len(low_name.translate(None, VOWELS))
+        consonants = len(low_name) - len(low_name.translate(None, CONSONANTS))
+    else:
+        vowels     = sum(map(low_name.count, VOWELS))
+        consonants = sum(map(low_name.count, CONSONANTS))
+
+    return (len(name), length_factors(len(name)), vowels, consonants)
+
+def length_factors(number):
+    """Returns the frozenset of the divisors of number from 2 up to number"""
+    factors = set()
+    i = 1
+    while i * i <= number:
+        if number % i == 0:
+            factors.add(i)
+            factors.add(number // i)
+        i += 1
+
+    factors.discard(1)
+    return frozenset(factors)
+
+def cache_stats():
+    return _cache.stats()
+
+def set_max_size(max_size):
+    _cache.set_max_size(max_size)
+
+def clear_cache():
+    _cache.clear()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python2.6
+'''Runs each matching mode on lists of customer and product names
+
+Every mode of main.py, batch and the server is a runner in RUNNERS: a
+function of the customer names and product names returning [pairs,
+suitability], the greedy runner adding its upper bound.  A new mode only
+has to be added here.  run_imperative alone takes options, the stats,
+memory_limit and mapped of ProductMatcher.
+
+The classes mode can also be run on name features read straight from the
+files, without keeping the names, with run_class_features.
+
+Usage:
+    (pairs, suitability) = runners.RUNNERS[mode](customer_names, product_names)[:2]
+
+Created on Oct 18, 2026
+'''
+
+from multiprocessing import cpu_count, current_process
+
+from milo_imperative import product_matcher as imperative_matcher
+from milo_functional import product_matcher as functional_matcher
+from milo_imperative import jv_matcher
+from milo_imperative import class_matcher
+from milo_imperative import sparse_matcher
+from milo_imperative import auction_matcher
+from milo_imperative import rectangular_matcher
+from milo_imperative import implicit_matcher
+from milo_imperative import greedy_matcher
+
+def run_imperative(customer_names, product_names, stats = None, memory_limit = None, mapped = False):
+    matcher = imperative_matcher.ProductMatcher(customer_names, product_names, stats = stats,
+                                                memory_limit = memory_limit, mapped = mapped)
+    try:
+        pairs = matcher.match_products()
+        suitability = matcher.match_suitability(pairs)
+    finally:
+        matcher.close()
+
+    return [pairs, suitability]
+
+def run_functional(customer_names, product_names):
+    return functional_matcher.matched_solution(customer_names, product_names)
+
+def run_jv(customer_names, product_names):
+    return _run(jv_matcher.JVMatcher(customer_names, product_names))
+
+def run_classes(customer_names, product_names):
+    return _run(class_matcher.ClassMatcher(customer_names, product_names))
+
+def run_class_features(customer_features, product_lengths):
+    return _run(class_matcher.ClassMatcher.from_features(customer_features, product_lengths))
+
+def run_sparse(customer_names, product_names):
+    return _run(sparse_matcher.SparseMatcher(customer_names, product_names))
+
+def run_auction(customer_names, product_names):
+    # Worker processes only pay for their round trips with NumPy bidding, and
+    # once a round can have PARALLEL_BIDDERS bidders.  A pool's own workers
+    # cannot start processes
+    size = max(len(customer_names), len(product_names))
+    if auction_matcher.numpy is not None and size >= auction_matcher.PARALLEL_BIDDERS \
+       and not current_process().daemon:
+        processes = cpu_count()
+    else:
+        processes = 1
+
+    return _run(auction_matcher.AuctionMatcher(customer_names, product_names, processes))
+
+def run_rectangular(customer_names, product_names):
+    return _run(rectangular_matcher.RectangularMatcher(customer_names, product_names))
+
+def run_implicit(customer_names, product_names):
+    return _run(implicit_matcher.ImplicitMatcher(customer_names, product_names))
+
+def run_greedy(customer_names, product_names):
+    matcher = greedy_matcher.GreedyMatcher(customer_names, product_names)
+    return _run(matcher) + [matcher.upper_bound()]
+
+def _run(matcher):
+    pairs = matcher.match_products()
+    return [pairs, matcher.match_suitability(pairs)]
+
+RUNNERS = {
+           "imperative" : run_imperative,
+           "functional" : run_functional,
+           "jv" : run_jv,
+           "classes" : run_classes,
+           "sparse" : run_sparse,
+           "auction" : run_auction,
+           "rectangular" : run_rectangular,
+           "implicit" : run_implicit,
+           "greedy" : run_greedy
+           }
+
+MODES = sorted(RUNNERS.keys())
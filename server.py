@@ -0,0 +1,354 @@
+#!/usr/bin/env python2.6
+'''Serves product matching over HTTP from a long running process
+
+Starting a process for every match pays for the interpreter, the imports
+and cold name caches each time.  The server keeps a pool of worker
+processes alive instead, so their name_cache and length_table stay warm
+from one request to the next, and the HTTP threads only wait on the pool.
+
+Small requests that arrive close together are batched: the dispatcher
+collects up to batch_size of them for at most batch_wait seconds and sends
+them to a worker as a single task.  Requests with more than SMALL_CELLS
+cells are sent on their own straight away.
+
+Requests are limited up front, before they reach a worker: the body to
+MAX_BODY_BYTES, each side to MAX_NAMES names and each name to
+MAX_NAME_LENGTH characters.  A request whose solve takes longer than the
+service's timeout (say because its worker died) gets a 504 reply rather
+than holding its thread forever.
+
+Requests:
+    POST /match    {"customers" : [...], "products" : [...], "mode" : "jv"}
+                   returns {"pairs" : [...], "suitability" : ...}
+    GET  /metrics  request, batch and latency counts and the worker caches
+    GET  /health   returns {"status" : "ok"}
+
+Usage:
+    service = MatchService()
+    server = MatchServer(("127.0.0.1", 8080), service)
+    server.serve_forever()
+
+Created on Oct 18, 2026
+'''
+
+import os
+import json
+import time
+import Queue
+import threading
+from collections import deque
+from multiprocessing import Pool, TimeoutError
+from SocketServer import ThreadingMixIn
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+
+import batch
+import name_cache
+
+DEFAULT_MODE = "jv"
+
+# Requests with at most this many cells are batched together
+SMALL_CELLS = 10000
+
+# Latencies kept for the percentiles in the metrics
+LATENCY_WINDOW = 1000
+
+# Longest time, in seconds, a request waits for its solve
+REQUEST_TIMEOUT = 300
+
+# Largest request body in bytes, and the most and longest names on a side
+MAX_BODY_BYTES = 16 << 20
+MAX_NAMES = 20000
+MAX_NAME_LENGTH = 1000
+
+class MatchService(object):
+    """Solves matching requests on a pool of worker processes"""
+
+    def __init__(self, processes = None, mode = DEFAULT_MODE, batch_size = 16, batch_wait = 0.005,
+                 timeout = REQUEST_TIMEOUT):
+        """
+        Args:
+            processes: number of workers (defaults to the number of CPUs)
+            mode: mode of requests that do not name one, one of batch.MODES
+            batch_size: most requests solved as one task
+            batch_wait: longest time, in seconds, a request waits for others
+            timeout: longest time, in seconds, a request waits for its solve
+        """
+        if mode not in batch.MODES:
+            raise ValueError("unknown mode " + repr(mode))
+
+        self.mode = mode
+        self.metrics = Metrics()
+        self._batch_size = batch_size
+        self._batch_wait = batch_wait
+        self._timeout = timeout
+
+        self._pool = Pool(processes)
+        self._queue = Queue.Queue()
+        self._dispatcher = threading.Thread(target = self._dispatch)
+        self._dispatcher.daemon = True
+        self._dispatcher.start()
+
+    ###############################################
+    # PUBLIC INSTANCE METHODS
+    ###############################################
+
+    def solve(self, customer_names, product_names, mode = None):
+        """Returns [pairs, suitability], waiting for a worker to solve it
+
+        Raises ValueError for an unknown mode, names over the limits or a
+        failed solve, and multiprocessing.TimeoutError if no worker solves it
+        within the timeout
+        """
+        mode = mode or self.mode
+        if mode not in batch.MODES:
+            raise ValueError("unknown mode " + repr(mode))
+        check_names(customer_names, product_names)
+
+        start = time.time()
+        request = _Request((customer_names, product_names, mode))
+        self._queue.put(request)
+        request.done.wait(self._timeout)
+        if not request.done.is_set():
+            self.metrics.record_request(time.time() - start, True)
+            raise TimeoutError("no result within %g seconds" % self._timeout)
+
+        (pairs, suitability, error) = request.result
+        self.metrics.record_request(time.time() - start, error is not None)
+        if error is not None:
+            raise ValueError(error)
+
+        return [pairs, suitability]
+
+    def close(self):
+        self._queue.put(None)
+        self._dispatcher.join()
+        self._pool.close()
+        self._pool.join()
+
+    ###############################################
+    # BATCHING
+    ###############################################
+
+    def _dispatch(self):
+        """Gathers requests into batches and hands each batch to the pool"""
+        stopping = False
+        while not stopping:
+            request = self._queue.get()
+            if request is None:
+                break
+
+            requests = [request]
+            if request.small:
+                deadline = time.time() + self._batch_wait
+                while len(requests) < self._batch_size:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        request = self._queue.get(True, remaining)
+                    except Queue.Empty:
+                        break
+
+                    if request is None:
+                        stopping = True
+                        break
+                    elif request.small:
+                        requests.append(request)
+                    else:
+                        self._submit([request])
+
+            self._submit(requests)
+
+    def _submit(self, requests):
+        # solve_requests never raises, so the callback always hands back the
+        # results.  Each request waits on its own event, as an AsyncResult
+        # only wakes one of the threads waiting on it
+        def deliver(reply):
+            (pid, cache_stats, results) = reply
+            self.metrics.record_cache(pid, cache_stats)
+            for request, result in zip(requests, results):
+                request.result = result
+                request.done.set()
+
+        self.metrics.record_batch(len(requests))
+        self._pool.apply_async(solve_requests, ([request.job for request in requests],),
+                               callback = deliver)
+
+def check_names(customer_names, product_names):
+    """Raises ValueError if either list has more than MAX_NAMES names or a
+    name longer than MAX_NAME_LENGTH
+    """
+    for names in (customer_names, product_names):
+        if len(names) > MAX_NAMES:
+            raise ValueError("at most %d names are allowed on each side, not %d" % (MAX_NAMES, len(names)))
+        if names and max(map(len, names)) > MAX_NAME_LENGTH:
+            raise ValueError("names may be at most %d characters long" % MAX_NAME_LENGTH)
+
+class _Request(object):
+
+    def __init__(self, job):
+        self.job = job
+        self.small = len(job[0]) * len(job[1]) <= SMALL_CELLS
+        self.done = threading.Event()
+        self.result = None
+
+def solve_requests(jobs):
+    """Solves a batch of (customer_names, product_names, mode) jobs in a worker
+
+    Returns (pid, name cache stats, results) with a [pairs, suitability, error]
+    result per job, error being None unless that job failed
+    """
+    results = []
+    for (customer_names, product_names, mode) in jobs:
+        try:
+            (pairs, suitability) = batch.solve_names(customer_names, product_names, mode)
+            results.append([pairs, suitability, None])
+        except Exception, exception:
+            results.append([None, None, "%s: %s" % (exception.__class__.__name__, exception)])
+
+    return (os.getpid(), name_cache.cache_stats(), results)
+
+###############################################
+# METRICS
+###############################################
+
+class Metrics(object):
+    """Counts requests and batches and keeps the recent latencies"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start = time.time()
+        self._requests = 0
+        self._errors = 0
+        self._batches = 0
+        self._batched = 0
+        self._latency_total = 0.0
+        self._latencies = deque(maxlen = LATENCY_WINDOW)
+        self._caches = {}
+
+    def record_request(self, seconds, error):
+        with self._lock:
+            self._requests += 1
+            self._errors += int(error)
+            self._latency_total += seconds
+            self._latencies.append(seconds)
+
+    def record_batch(self, size):
+        with self._lock:
+            self._batches += 1
+            self._batched += size
+
+    def record_cache(self, pid, stats):
+        """Keep the latest name cache stats reported by a worker"""
+        with self._lock:
+            self._caches[pid] = stats
+
+    def snapshot(self):
+        """Returns the metrics as a dictionary, with times in milliseconds"""
+        with self._lock:
+            uptime = time.time() - self._start
+            latencies = sorted(self._latencies)
+
+            cache = dict((key, sum(stats[key] for stats in self._caches.values()))
+                         for key in ("hits", "misses", "evictions", "size"))
+            cache["workers"] = len(self._caches)
+
+            return {
+                    "uptime" : uptime,
+                    "requests" : self._requests,
+                    "errors" : self._errors,
+                    "throughput" : self._requests / max(uptime, 1e-9),
+                    "batches" : self._batches,
+                    "mean_batch_size" : self._batched / float(max(self._batches, 1)),
+                    "latency_ms" : {
+                                    "mean" : 1000 * self._latency_total / max(self._requests, 1),
+                                    "p50" : 1000 * _percentile(latencies, 0.5),
+                                    "p95" : 1000 * _percentile(latencies, 0.95),
+                                    "max" : 1000 * _percentile(latencies, 1.0)
+                                    },
+                    "name_cache" : cache
+                    }
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+###############################################
+# HTTP
+###############################################
+
+class MatchServer(ThreadingMixIn, HTTPServer):
+    """An HTTP server handling each connection on its own thread"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    # Longer request bodies are refused without being read
+    max_body = MAX_BODY_BYTES
+
+    def __init__(self, address, service):
+        HTTPServer.__init__(self, address, MatchHandler)
+        self.service = service
+
+class MatchHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._reply(200, self.server.service.metrics.snapshot())
+        elif self.path == "/health":
+            self._reply(200, {"status" : "ok"})
+        else:
+            self._reply(404, {"error" : "not found"})
+
+    def do_POST(self):
+        if self.path != "/match":
+            self._reply(404, {"error" : "not found"})
+            return
+
+        try:
+            length = int(self.headers.getheader("content-length") or 0)
+            if not 0 <= length <= self.server.max_body:
+                self._reply(413, {"error" : "request bodies may be at most %d bytes" % self.server.max_body})
+                return
+
+            request = json.loads(self.rfile.read(length))
+            customer_names = request["customers"]
+            product_names = request["products"]
+            if not (isinstance(customer_names, list) and isinstance(product_names, list)):
+                raise ValueError("customers and products must be lists of names")
+
+            (pairs, suitability) = self.server.service.solve(customer_names, product_names,
+                                                             request.get("mode"))
+        except (ValueError, KeyError, TypeError), error:
+            self._reply(400, {"error" : str(error)})
+            return
+        except TimeoutError, error:
+            self._reply(504, {"error" : str(error)})
+            return
+
+        self._reply(200, {"pairs" : pairs, "suitability" : suitability})
+
+    def log_message(self, format, *args):
+        # Requests are counted in the metrics rather than logged one by one
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+def serve(port = 8080, mode = DEFAULT_MODE, host = "127.0.0.1"):
+    """Serves until interrupted"""
+    service = MatchService(mode = mode)
+    server = MatchServer((host, port), service)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python2.6
+'''Benchmarks every matching engine across sizes and shapes of input
+
+Each case is a square (n x n), tall (n customers x n/2 products) or wide
+(n/2 x n) list of random names generated from a fixed seed, so every run of
+the suite sees the same inputs.  Each engine solves each case it is not too
+slow for (see MAX_SIZES) after a warmup run, then repeats times.  Cases run
+in a fresh worker process, so that they do not share their peak memory.
+The peak is measured in a worker of its own, solving the case once with no
+warmup, as a warmup would already have reached it before the timed runs.
+The imperative engine also reports the time spent in each of its steps.
+
+The results are written as JSON and can be compared with a stored baseline:
+any case or step slower than the baseline by more than the tolerance is
+reported as a regression and the script exits with status 1.
+
+Usage:
+    python tests/benchmark.py [--sizes 10,100,1000] [--engines jv,auction]
+                              [--shapes square,tall] [--repeats 3] [--warmup 1]
+                              [--output results.json] [--baseline baseline.json]
+                              [--tolerance 0.25]
+
+Created on Oct 18, 2026
+'''
+
+import os
+import sys
+import json
+import time
+import random
+import resource
+from optparse import OptionParser
+from multiprocessing import Pool
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import file_generate #@UnresolvedImport
+import runners #@UnresolvedImport
+from milo_imperative import stats as matcher_stats #@UnresolvedImport
+
+SIZES  = [10, 30, 100, 300, 1000, 3000, 10000]
+SHAPES = ["square", "tall", "wide"]
+
+MAX_LENGTH = 25
+SEED = 2010
+
+# Largest case (in names per side) each engine is run on by default
+MAX_SIZES = {
+             "functional" : 300,
+             "imperative" : 1000,
+             "jv"         : 3000,
+             "auction"    : 3000,
+             "rectangular": 10000,
+             "implicit"   : 10000,
+             "greedy"     : 10000,
+             "sparse"     : 10000,
+             "classes"    : 10000
+             }
+
+ENGINES = sorted(MAX_SIZES.keys())
+
+###############################################
+# CASES
+###############################################
+
+def case_shape(shape, size):
+    """Returns (customers, products) for a shape of the given size"""
+    if shape == "square":
+        return (size, size)
+    elif shape == "tall":
+        return (size, max(1, size // 2))
+    elif shape == "wide":
+        return (max(1, size // 2), size)
+
+    raise ValueError("unknown shape " + repr(shape))
+
+def case_names(customers, products):
+    """Returns the (customer_names, product_names) of a case, the same every time"""
+    random.seed("%d %d %d" % (SEED, customers, products))
+    return ([file_generate.gen_random_string(MAX_LENGTH) for i in range(customers)],
+            [file_generate.gen_random_string(MAX_LENGTH) for i in range(products)])
+
+def solve(engine, customer_names, product_names, stats = None):
+    """Returns [pairs, suitability] from one engine"""
+    if engine == "imperative":
+        return runners.run_imperative(customer_names, product_names, stats = stats)
+
+    return runners.RUNNERS[engine](customer_names, product_names)[:2]
+
+###############################################
+# RUNS
+###############################################
+
+def peak_memory(task):
+    """Solves one case once, in a worker of its own
+
+    Returns how far the solve raised the worker's peak resident size, in kB
+    """
+    (engine, shape, size, warmup, repeats) = task
+    names = case_names(*case_shape(shape, size))
+
+    start_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    solve(engine, *names)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start_memory
+
+def run_case(task):
+    """Runs one engine on one case, in a worker of its own
+
+    Returns the result record written to the JSON output, but for its peak
+    memory (see peak_memory)
+    """
+    (engine, shape, size, warmup, repeats) = task
+    (customers, products) = case_shape(shape, size)
+    names = case_names(customers, products)
+
+    for i in range(warmup):
+        solve(engine, *names)
+
+    seconds = []
+    steps = {}
+    for i in range(repeats):
+        stats = matcher_stats.Stats()
+        start = time.time()
+        (pairs, suitability) = solve(engine, names[0], names[1], stats)
+        seconds.append(time.time() - start)
+
+        # Keep the fastest time of each step
+        for name, elapsed in stats.seconds.iteritems():
+            steps[name] = min(elapsed, steps.get(name, elapsed))
+
+    return {
+            "engine" : engine,
+            "shape" : shape,
+            "customers" : customers,
+            "products" : products,
+            "seconds" : seconds,
+            "best" : min(seconds),
+            "suitability" : suitability,
+            "steps" : steps
+            }
+
+def run_suite(engines = ENGINES, shapes = SHAPES, sizes = SIZES, warmup = 1, repeats = 3,
+              limit = True):
+    """Runs every engine on every case, yielding each result as it finishes
+
+    With limit, engines are only run on cases up to their MAX_SIZES
+    """
+    tasks = [(engine, shape, size, warmup, repeats)
+             for size in sizes for shape in shapes for engine in engines
+             if not limit or size <= MAX_SIZES[engine]]
+
+    # One worker and one task per process, so that cases neither overlap in
+    # time nor share their peak memory
+    pool = Pool(1, maxtasksperchild = 1)
+    try:
+        for task in tasks:
+            peak_kb = pool.apply(peak_memory, (task,))
+            result = pool.apply(run_case, (task,))
+            result["peak_kb"] = peak_kb
+            yield result
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+###############################################
+# BASELINES
+###############################################
+
+def case_key(result):
+    return (result["engine"], result["shape"], result["customers"], result["products"])
+
+def compare(results, baseline, tolerance = 0.25):
+    """Returns a line of text for every case or step slower than its baseline
+
+    A case regresses when its best time is more than tolerance above the
+    baseline's; a step when its time is, and the step took at least a
+    millisecond (shorter steps are mostly noise).  A changed suitability is
+    always reported
+    """
+    expected = dict((case_key(result), result) for result in baseline)
+    regressions = []
+
+    for result in results:
+        old = expected.get(case_key(result))
+        if old is None:
+            continue
+
+        name = "%s %s %dx%d" % case_key(result)
+        if result["suitability"] != old["suitability"]:
+            regressions.append("%s: suitability %s, was %s" % (name, result["suitability"], old["suitability"]))
+
+        if result["best"] > old["best"] * (1 + tolerance):
+            regressions.append("%s: %.4fs, was %.4fs" % (name, result["best"], old["best"]))
+
+        for step, seconds in sorted(result["steps"].iteritems()):
+            old_seconds = old["steps"].get(step)
+            if old_seconds is not None and old_seconds >= 0.001 and seconds > old_seconds * (1 + tolerance):
+                regressions.append("%s %s: %.4fs, was %.4fs" % (name, step, seconds, old_seconds))
+
+    return regressions
+
+###############################################
+# COMMAND LINE
+###############################################
+
+def main(args):
+    parser = OptionParser(usage = "%prog [options]")
+    parser.add_option("--sizes", default = ",".join(map(str, SIZES)),
+                      help = "comma separated sizes (names per side)")
+    parser.add_option("--shapes", default = ",".join(SHAPES), help = "square, tall and/or wide")
+    parser.add_option("--engines", default = ",".join(ENGINES), help = "engines to run")
+    parser.add_option("--warmup", type = "int", default = 1, help = "untimed runs per case")
+    parser.add_option("--repeats", type = "int", default = 3, help = "timed runs per case")
+    parser.add_option("--no-limit", action = "store_false", dest = "limit", default = True,
+                      help = "run every engine on every size, however slow")
+    parser.add_option("--output", default = "benchmark.json", help = "file to write the results to")
+    parser.add_option("--baseline", help = "results file to compare against")
+    parser.add_option("--tolerance", type = "float", default = 0.25,
+                      help = "allowed slowdown over the baseline, as a fraction")
+    (options, rest) = parser.parse_args(args)
+
+    engines = options.engines.split(",")
+    for engine in engines:
+        if engine not in MAX_SIZES:
+            parser.error("unknown engine " + engine)
+
+    results = []
+    print "%-11s %-7s %11s %10s %10s %14s" % ("engine", "shape", "size", "best(s)", "peak(kB)", "suitability")
+    for result in run_suite(engines, options.shapes.split(","),
+                            [int(size) for size in options.sizes.split(",")],
+                            options.warmup, options.repeats, options.limit):
+        print "%-11s %-7s %5dx%-5d %10.4f %10d %14s" % (result["engine"], result["shape"],
+                                                        result["customers"], result["products"],
+                                                        result["best"], result["peak_kb"], result["suitability"])
+        results.append(result)
+
+    output = open(options.output, "w")
+    json.dump(results, output, indent = 1, sort_keys = True)
+    output.close()
+
+    if options.baseline:
+        regressions = compare(results, json.load(open(options.baseline)), options.tolerance)
+
+        print ""
+        if regressions:
+            print "Regressions against " + options.baseline + ":"
+            for line in regressions:
+                print "    " + line
+            return 1
+
+        print "No regressions against " + options.baseline
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
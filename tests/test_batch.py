@@ -0,0 +1,76 @@
+#!/usr/bin/env python2.6
+'''Tests the process pool batch solver
+
+Created on Oct 18, 2026
+'''
+import batch #@UnresolvedImport
+import runners #@UnresolvedImport
+
+import unittest
+import tempfile
+import os
+
+CASE_PATH= "./cases/"
+
+class Batch(unittest.TestCase):
+
+    def test_read_manifest(self):
+        (handle, path) = tempfile.mkstemp()
+        try:
+            os.write(handle, "# comment\n\na.txt b.txt\r\nc d.txt\t/tmp/e.txt\n")
+            os.close(handle)
+
+            base = os.path.dirname(path)
+            self.assertEqual([(os.path.join(base, "a.txt"), os.path.join(base, "b.txt")),
+                              (os.path.join(base, "c d.txt"), "/tmp/e.txt")],
+                             batch.read_manifest(path))
+        finally:
+            os.remove(path)
+
+    def test_bad_manifest(self):
+        (handle, path) = tempfile.mkstemp()
+        try:
+            os.write(handle, "a.txt b.txt c.txt\n")
+            os.close(handle)
+            self.assertRaises(ValueError, batch.read_manifest, path)
+        finally:
+            os.remove(path)
+
+    def test_solve_batch(self):
+        jobs = [(CASE_PATH+"customers-"+str(i)+".txt", CASE_PATH+"products-"+str(i)+".txt")
+                for i in range(7)]
+        jobs.append((CASE_PATH+"missing.txt", CASE_PATH+"products-0.txt"))
+
+        for mode in batch.MODES:
+            results = sorted(batch.solve_batch(jobs, mode, 2))
+            self.assertEqual(range(len(jobs)), [result[0] for result in results])
+
+            # Must match solving the same files in this process
+            for (index, pairs, suitability, seconds, error) in results[:-1]:
+                expected = batch.solve_files(jobs[index][0], jobs[index][1], mode)
+                self.assertEqual(expected[1], suitability)
+                self.assertEqual(len(expected[0]), len(pairs))
+                self.assertTrue(error is None and seconds >= 0)
+
+            # A failed job is reported without stopping the others
+            self.assertEqual([None, None], results[-1][1:3])
+            self.assertTrue(results[-1][4].startswith("IOError"))
+
+    def test_runners(self):
+        # Every mode main.py runs is also a batch mode, solved by the same runner
+        self.assertEqual(sorted(runners.RUNNERS.keys()), batch.MODES)
+        
+        # Without the empty last name, which the functional engine scores differently
+        names = [open(CASE_PATH+side+"-3.txt").read().replace("\r","").split("\n")[:-1]
+                 for side in ("customers", "products")]
+        for mode in batch.MODES:
+            self.assertEqual(17.5, batch.solve_names(names[0], names[1], mode)[1])
+        
+        (pairs, suitability, bound) = runners.run_greedy(["Jack", "Jill"], ["Widget"])
+        self.assertTrue(suitability <= bound)
+    
+    def test_unknown_mode(self):
+        self.assertRaises(ValueError, list, batch.solve_batch([], "unknown"))
+
+if __name__ == '__main__':
+    unittest.main()
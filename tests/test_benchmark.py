@@ -0,0 +1,62 @@
+#!/usr/bin/env python2.6
+'''Tests the benchmark suite
+
+Created on Oct 18, 2026
+'''
+import benchmark #@UnresolvedImport
+
+import unittest
+
+class Benchmark(unittest.TestCase):
+
+    def test_case_names(self):
+        self.assertEqual((10, 5), benchmark.case_shape("tall", 10))
+        self.assertEqual((5, 10), benchmark.case_shape("wide", 10))
+        self.assertRaises(ValueError, benchmark.case_shape, "round", 10)
+        
+        # The same case always has the same names
+        (customer_names, product_names) = benchmark.case_names(8, 4)
+        self.assertEqual((8, 4), (len(customer_names), len(product_names)))
+        self.assertEqual((customer_names, product_names), benchmark.case_names(8, 4))
+        self.assertNotEqual(customer_names, benchmark.case_names(8, 5)[0])
+    
+    def test_run_suite(self):
+        results = list(benchmark.run_suite(["imperative", "jv"], ["square", "wide"], [12], 0, 2))
+        
+        self.assertEqual([("imperative", "square", 12, 12), ("jv", "square", 12, 12),
+                          ("imperative", "wide", 6, 12), ("jv", "wide", 6, 12)],
+                         map(benchmark.case_key, results))
+        
+        # Both engines are exact and only the imperative engine has steps
+        self.assertEqual(results[0]["suitability"], results[1]["suitability"])
+        self.assertEqual(2, len(results[0]["seconds"]))
+        self.assertEqual(min(results[0]["seconds"]), results[0]["best"])
+        self.assertTrue("prime_zeroes" in results[0]["steps"])
+        self.assertEqual({}, results[1]["steps"])
+    
+    def test_peak_memory(self):
+        # The warmup must not hide the memory of the timed runs
+        (result,) = benchmark.run_suite(["jv"], ["square"], [300], 1, 1)
+        self.assertTrue(result["peak_kb"] > 0)
+        
+        # In this process the peak may already be higher than the case needs
+        self.assertTrue(benchmark.peak_memory(("jv", "square", 10, 1, 1)) >= 0)
+    
+    def test_compare(self):
+        baseline = [{"engine" : "jv", "shape" : "square", "customers" : 10, "products" : 10,
+                     "best" : 1.0, "suitability" : 5.0, "steps" : {"a" : 0.5, "b" : 0.0001}}]
+        
+        same = [dict(baseline[0], best = 1.2, steps = {"a" : 0.6, "b" : 0.001})]
+        self.assertEqual([], benchmark.compare(same, baseline))
+        
+        slower = [dict(baseline[0], best = 1.3, suitability = 4.0, steps = {"a" : 0.7, "b" : 0.001})]
+        self.assertEqual(["jv square 10x10: suitability 4.0, was 5.0",
+                          "jv square 10x10: 1.3000s, was 1.0000s",
+                          "jv square 10x10 a: 0.7000s, was 0.5000s"],
+                         benchmark.compare(slower, baseline))
+        
+        # Cases missing from the baseline are skipped
+        self.assertEqual([], benchmark.compare([dict(slower[0], shape = "tall")], baseline))
+
+if __name__ == '__main__':
+    unittest.main()
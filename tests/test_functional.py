@@ -7,6 +7,7 @@ Created on May 2, 2010
 '''
 from milo_functional import names #@UnresolvedImport
 from milo_functional import product_matcher #@UnresolvedImport
+from milo_functional.pvector import PVector, pmatrix #@UnresolvedImport
 
 import unittest
 import pickle
@@ -33,6 +34,14 @@ class ProductMatcherSteps(unittest.TestCase):
         for i, expected in enumerate(cases):
             (customer_names, product_names) = self._get_matcher(i)            
             self.assertEqual(expected,product_matcher.suitability_matrix(customer_names, product_names))
+    
+    def test_long_name(self):
+        # A name far longer than the length table is scored directly
+        customer_names = ["ab" * 4000 + "c", "Jack"]
+        product_names = ["x" * 6001, "Banana"]
+        # 8001 = 9 * 7 * 127 shares a 3 with Banana but nothing with 6001 = 17 * 353
+        expected = [[4001, 9000], [3, 2.25]]
+        self.assertEqual(expected, product_matcher.suitability_matrix(customer_names, product_names))
             
      
     def test_uncovered_zero(self):
@@ -88,6 +97,16 @@ class ProductMatcherSteps(unittest.TestCase):
         for i, expected in enumerate(cases):
             self.assertEqual(expected, product_matcher.matched_solution(*self._get_matcher(i))[1]) 
     
+    def test_large_file(self):
+        # Runs far more steps than the recursion limit would allow without the trampoline
+        customer_names = open(CASE_PATH+'customers-large.txt').read().replace("\r","").split('\n')
+        product_names  = open(CASE_PATH+'products-large.txt').read().replace("\r","").split('\n')
+        self.assertEqual(1489.5, product_matcher.matched_solution(customer_names, product_names)[1])
+    
+    def test_trampoline(self):
+        countdown = lambda n: (n == 0 and [n]) or (lambda: countdown(n-1))
+        self.assertEqual([0], product_matcher.trampoline(countdown(100000)))
+    
     def _get_matcher(self, index):
         customer_names = open(CASE_PATH+'customers-'+str(index)+'.txt').read().replace("\r","").split('\n')
         product_names  = open(CASE_PATH+'products-' +str(index)+'.txt').read().replace("\r","").split('\n')
@@ -134,6 +153,41 @@ class ProductMatcherSteps(unittest.TestCase):
             self.assertEqual(result[0],product_matcher.construct_path(input[0],input[3]))
 """
 
+class PersistentVector(unittest.TestCase):
+    
+    def test_set(self):
+        # Sizes around the 32 element node boundaries
+        for size in (1, 31, 32, 33, 1024, 1025, 5000):
+            items = range(size)
+            vector = PVector(items)
+            
+            for index in (0, size/2, size-1, -1):
+                changed = vector.set(index, "x")
+                expected = list(items)
+                expected[index] = "x"
+                
+                self.assertEqual(expected, changed.tolist())
+                self.assertEqual("x", changed[index])
+                self.assertEqual(items, vector.tolist())
+    
+    def test_sequence(self):
+        vector = PVector("abc")
+        self.assertEqual(3, len(vector))
+        self.assertEqual(["a","b","c"], vector)
+        self.assertNotEqual(["a","b"], vector)
+        self.assertEqual("c", vector[-1])
+        self.assertEqual([], PVector())
+        self.assertRaises(IndexError, lambda: vector[3])
+        self.assertRaises(IndexError, lambda: PVector().set(0, 1))
+    
+    def test_pmatrix(self):
+        matrix = pmatrix([[1,2],[3,4]])
+        changed = matrix.set(1, matrix[1].set(0, 5))
+        
+        self.assertEqual([[1,2],[5,4]], changed)
+        self.assertEqual([[1,2],[3,4]], matrix)
+        self.assertTrue(changed[0] is matrix[0])
+
 class NameClasses(unittest.TestCase):
     
     def test_has_common_factors(self):
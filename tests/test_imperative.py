@@ -9,8 +9,23 @@ Created on May 2, 2010
 from milo_imperative import product_matcher #@UnresolvedImport
 from milo_imperative import names #@UnresolvedImport
 from milo_imperative import logger #@UnresolvedImport
+from milo_imperative import jv_matcher #@UnresolvedImport
+from milo_imperative import features #@UnresolvedImport
+from milo_imperative import class_matcher #@UnresolvedImport
+from milo_imperative import sparse_matcher #@UnresolvedImport
+from milo_imperative import auction_matcher #@UnresolvedImport
+from milo_imperative import rectangular_matcher #@UnresolvedImport
+from milo_imperative import implicit_matcher #@UnresolvedImport
+from milo_imperative import greedy_matcher #@UnresolvedImport
+from milo_imperative import tracer #@UnresolvedImport
+from milo_imperative import stats #@UnresolvedImport
+from milo_imperative import storage #@UnresolvedImport
+import length_table #@UnresolvedImport
 
+import os
 import unittest
+import random
+import itertools
 
 
 CASE_PATH= "./cases/"
@@ -59,6 +74,24 @@ class ProductMatcherSteps(unittest.TestCase):
         for i, expected in enumerate(cases):
             matcher = self._get_matcher(i)            
             self.assertEqual(expected,matcher.suitability_matrix())
+    
+    def test_long_name(self):
+        # A name far longer than the length table is scored without growing it
+        customer_names = ["ab" * 4000 + "c", "Jack"]
+        product_names = ["x" * 6001, "Banana"]
+        # 8001 = 9 * 7 * 127 shares a 3 with Banana but nothing with 6001 = 17 * 353
+        expected = [[4001, 9000], [3, 2.25]]
+        
+        matcher = product_matcher.ProductMatcher(customer_names, product_names)
+        self.assertEqual(expected, matcher.suitability_matrix())
+        self.assertEqual([1, 0], matcher.match_products())
+        for other in (implicit_matcher.ImplicitMatcher(customer_names, product_names),
+                      implicit_matcher.ImplicitMatcher(customer_names, product_names[:1]),
+                      greedy_matcher.GreedyMatcher(customer_names, product_names)):
+            pairs = other.match_products()
+            self.assertEqual(sum(expected[row][col] for row, col in enumerate(pairs) if col != -1),
+                             other.match_suitability(pairs))
+        self.assertEqual(length_table.MAX_SIZE, length_table._table[0])
             
     def _get_matcher(self, index,log = None):
         customer_names = open(CASE_PATH+'customers-'+str(index)+'.txt').read().replace("\r","").split('\n')
@@ -69,6 +102,582 @@ class ProductMatcherSteps(unittest.TestCase):
         product_names.pop()
         return product_matcher.ProductMatcher(customer_names, product_names, log)
 
+class CheckedTracer(tracer.Tracer):
+    """Also takes a full snapshot of the matcher at every kept checkpoint"""
+    
+    def __init__(self, sample = 1, capacity = 4096):
+        tracer.Tracer.__init__(self, sample, capacity)
+        self.expected = []
+    
+    def log(self, input, function_name, matcher):
+        length = self._length
+        tracer.Tracer.log(self, input, function_name, matcher)
+        if self._length > length:
+            self.expected.append((input, function_name, tracer.snapshot(matcher)))
+
+class TracerSteps(unittest.TestCase):
+    
+    def test_snapshots(self):
+        # A tiny buffer makes the tracer grow it several times
+        for append in ("3.txt", "multi.crashF"):
+            trace = CheckedTracer(capacity = 1)
+            product_matcher.ProductMatcher(*_get_names(append, append.endswith(".txt")), 
+                                           logger = trace).match_products()
+            
+            self.assertTrue(len(trace.expected) > 10)
+            self.assertEqual(trace.expected, trace.snapshots())
+    
+    def test_sample(self):
+        names = _get_names("multi.crashF", False)
+        
+        full = tracer.Tracer()
+        product_matcher.ProductMatcher(*names, logger = full).match_products()
+        sampled = tracer.Tracer(sample = 3)
+        product_matcher.ProductMatcher(*names, logger = sampled).match_products()
+        
+        # Every third call of each function, with the input and output of a call together
+        for name in ("cover_columns", "prime_zeroes", "adjust_matrix"):
+            for input in (True, False):
+                # The two runs share everything but their name objects
+                states = [state[:4] for (kind, function_name, state) in full.snapshots() 
+                          if kind == input and function_name == name]
+                self.assertEqual(states[::3],
+                                 [state[:4] for (kind, function_name, state) in sampled.snapshots() 
+                                  if kind == input and function_name == name])
+
+class StatsSteps(unittest.TestCase):
+    
+    def test_stats(self):
+        names = _get_names("multi.crashF", False)
+        
+        collected = stats.Stats()
+        matcher = product_matcher.ProductMatcher(*names, stats = collected)
+        pairs = matcher.match_products()
+        
+        # Each augmenting path is followed by another cover and has odd length
+        self.assertEqual(pairs, product_matcher.ProductMatcher(*names).match_products())
+        self.assertEqual(1, collected.calls["setup"])
+        self.assertEqual(1, collected.calls["run_matcher"])
+        self.assertEqual(collected.calls["construct_path"], len(collected.path_lengths))
+        self.assertEqual(collected.calls["construct_path"] + 1, collected.calls["cover_columns"])
+        self.assertTrue(all(length % 2 == 1 for length in collected.path_lengths))
+        self.assertTrue(collected.counters["matrix_scans"] >= 1)
+        
+        report = collected.report()
+        for name in ("setup", "run_matcher", "augmentations", "matrix_scans"):
+            self.assertTrue(name in report)
+
+class StorageSteps(unittest.TestCase):
+    
+    def test_typecode(self):
+        self.assertEqual("h", storage.typecode(0))
+        self.assertEqual("h", storage.typecode(32767))
+        self.assertEqual("i", storage.typecode(32768))
+        self.assertEqual("i", storage.typecode(0, -32769))
+        self.assertRaises(OverflowError, storage.typecode, 2 ** 64)
+    
+    def test_compact_rows(self):
+        case = _get_names("multi.crashF", False)
+        matcher = product_matcher.ProductMatcher(*case)
+        pairs = matcher.match_products()
+        
+        self.assertEqual("h", matcher._matrix.typecode)
+        self.assertFalse(hasattr(matcher, "_scores"))
+        
+        # The same total as scoring every cell with names.Customer
+        customers = [names.Customer(name) for name in case[0]]
+        products  = [names.Product(name) for name in case[1]]
+        expected = sum(customers[row].get_suitability(products[col])
+                       for row, col in enumerate(pairs) if col != -1)
+        self.assertEqual(expected, matcher.match_suitability(pairs))
+    
+    def test_memory_limit(self):
+        case = _get_names("large.txt", False)
+        size = max(map(len, case))
+        needed = storage.matrix_bytes(size, size, "h")
+        
+        self.assertRaises(MemoryError, product_matcher.ProductMatcher, *case, memory_limit = needed - 1)
+        
+        matcher = product_matcher.ProductMatcher(*case, memory_limit = needed)
+        self.assertEqual(1489.5, matcher.match_suitability(matcher.match_products()))
+    
+    def test_default_memory_limit(self):
+        original = storage.MEMORY_LIMIT
+        storage.MEMORY_LIMIT = 100
+        try:
+            self.assertRaises(MemoryError, product_matcher.ProductMatcher, *_get_names("multi.txt", False))
+        finally:
+            storage.MEMORY_LIMIT = original
+
+class MappedStorageSteps(unittest.TestCase):
+    
+    def test_mapped_matrix(self):
+        rows = [[i * 10 + j for j in range(7)] for i in range(5)]
+        matrix = storage.MappedMatrix("h", 7, rows, block_bytes = 28)
+        
+        self.assertEqual(2, matrix.block_rows)
+        self.assertTrue(os.path.exists(matrix.path))
+        self.assertEqual(5, len(matrix))
+        self.assertEqual(rows[3], matrix[3].tolist())
+        self.assertEqual(rows[-1], matrix[-1].tolist())
+        self.assertEqual(rows, [row.tolist() for row in matrix])
+        self.assertEqual(3, matrix.block_reads)
+        self.assertEqual([row[4] for row in rows], matrix.column(4).tolist())
+        
+        matrix.close()
+        self.assertFalse(os.path.exists(matrix.path))
+    
+    def test_same_as_memory(self):
+        rows = [[i * j for j in range(6)] for i in range(4)]
+        mapped = storage.build("i", 6, rows, True)
+        in_memory = storage.build("i", 6, rows)
+        
+        self.assertEqual(list(in_memory), list(mapped))
+        for col in range(6):
+            self.assertEqual(in_memory.column(col), mapped.column(col))
+        mapped.close()
+    
+    def test_mapped_matcher(self):
+        case = _get_names("large.txt", False)
+        collected = stats.Stats()
+        matcher = product_matcher.ProductMatcher(*case, stats = collected, mapped = True)
+        pairs = matcher.match_products()
+        
+        self.assertEqual(product_matcher.ProductMatcher(*case).match_products(), pairs)
+        self.assertEqual(1489.5, matcher.match_suitability(pairs))
+        self.assertEqual(storage.BLOCK_BYTES // (2 * 150) * 300, collected.values["block_bytes"])
+        self.assertEqual(150 * 150 * 2, collected.values["matrix_bytes"])
+        self.assertTrue(collected.counters["block_reads"] >= collected.counters["matrix_scans"])
+        self.assertTrue("major_faults" in collected.report())
+        
+        # Folding in the offsets writes a new file and drops the old one
+        path = matcher._matrix.path
+        matcher.get_matrix()
+        self.assertFalse(os.path.exists(path))
+        
+        path = matcher._matrix.path
+        self.assertTrue(os.path.exists(path))
+        matcher.close()
+        self.assertFalse(os.path.exists(path))
+        
+        # A matcher that never built its matrix has nothing to free
+        product_matcher.ProductMatcher(*case, mapped = True).close()
+
+class JVMatcherSteps(unittest.TestCase):
+    
+    def test_match_suitability(self):
+        cases = ( 11.5, 7, 4.5, 17.5, 20.25, 19.75, 4.5 )
+        
+        for i, expected in enumerate(cases):
+            matcher = jv_matcher.JVMatcher(*_get_names(str(i)+'.txt'))
+            pairs = matcher.match_products()
+            self.assertEqual(expected, matcher.match_suitability(pairs))
+    
+    def test_same_suitability(self):
+        # Every case file should give the same total as the Munkres engine
+        for append in ("multi.txt", "multi.crashF", "multi.diff"):
+            names = _get_names(append, False)
+            
+            expected = product_matcher.ProductMatcher(*names)
+            matcher = jv_matcher.JVMatcher(*names)
+            
+            self.assertEqual(expected.match_suitability(expected.match_products()),
+                             matcher.match_suitability(matcher.match_products()))
+    
+    def test_large_file(self):
+        matcher = jv_matcher.JVMatcher(*_get_names("large.txt", False))
+        self.assertEqual(1489.5, matcher.match_suitability(matcher.match_products()))
+    
+    def test_augment(self):
+        cost = [[4,1,3],[2,0,5],[3,2,2]]
+        u = [0,0,0]
+        v = [0,0,0]
+        row_col = [-1,-1,-1]
+        col_row = [-1,-1,-1]
+        
+        for row in range(3):
+            jv_matcher.augment(cost, u, v, row_col, col_row, row)
+            
+            for i in range(3):
+                for j in range(3):
+                    self.assertTrue(cost[i][j]-u[i]-v[j] >= 0)
+        
+        self.assertEqual([1,0,2], row_col)
+        self.assertEqual([1,0,2], col_row)
+
+def _get_names(append, pop = True):
+    customer_names = open(CASE_PATH+'customers-'+append).read().replace("\r","").split('\n')
+    product_names  = open(CASE_PATH+'products-' +append).read().replace("\r","").split('\n')
+    
+    # My files from excel have an extra new lines...
+    if pop:
+        customer_names.pop()
+        product_names.pop()
+    return (customer_names, product_names)
+
+class JVMatcherUpdates(unittest.TestCase):
+    
+    def test_updates(self):
+        # Each update should leave the same total as solving from scratch
+        (customer_names, product_names) = _get_names("multi.crashF", False)
+        (extra_customers, extra_products) = _get_names("multi.diff", False)
+        
+        matcher = jv_matcher.JVMatcher(customer_names, product_names)
+        matcher.match_products()
+        
+        random.seed(4)
+        for step in range(60):
+            action = random.choice(["add", "remove", "rename"])
+            customer = random.random() < 0.5
+            if customer:
+                (current, extra) = (customer_names, extra_customers)
+            else:
+                (current, extra) = (product_names, extra_products)
+            
+            if action == "remove" and len(current) > 1:
+                index = random.randrange(len(current))
+                del current[index]
+                if customer:
+                    matcher.remove_customer(index)
+                else:
+                    matcher.remove_product(index)
+            elif action == "rename":
+                index = random.randrange(len(current))
+                current[index] = random.choice(extra)
+                if customer:
+                    matcher.rename_customer(index, current[index])
+                else:
+                    matcher.rename_product(index, current[index])
+            else:
+                index = random.randrange(len(current) + 1)
+                current.insert(index, random.choice(extra))
+                if customer:
+                    matcher.add_customer(current[index], index)
+                else:
+                    matcher.add_product(current[index], index)
+            
+            expected = jv_matcher.JVMatcher(customer_names, product_names)
+            pairs = matcher.get_matching()
+            
+            self.assertEqual(len(customer_names), len(pairs))
+            self.assertEqual(min(len(customer_names),len(product_names)), len(pairs) - pairs.count(-1))
+            self.assertEqual(expected.match_suitability(expected.match_products()),
+                             expected.match_suitability(pairs))
+
+class ClassMatcherSteps(unittest.TestCase):
+    
+    def test_match_suitability(self):
+        cases = ( 11.5, 7, 4.5, 17.5, 20.25, 19.75, 4.5 )
+        
+        for i, expected in enumerate(cases):
+            matcher = class_matcher.ClassMatcher(*_get_names(str(i)+'.txt'))
+            pairs = matcher.match_products()
+            self.assertEqual(expected, matcher.match_suitability(pairs))
+            self.assertEqual(expected, product_matcher.ProductMatcher(*_get_names(str(i)+'.txt')).match_suitability(pairs))
+    
+    def test_same_suitability(self):
+        for append in ("multi.txt", "multi.crashF", "multi.diff"):
+            (customer_names, product_names) = _get_names(append, False)
+            
+            # Repeat the names so that classes have several members
+            customer_names = customer_names * 3
+            product_names = product_names[:len(product_names)/2] * 5
+            
+            expected = jv_matcher.JVMatcher(customer_names, product_names)
+            matcher = class_matcher.ClassMatcher(customer_names, product_names)
+            pairs = matcher.match_products()
+            
+            self.assertEqual(min(len(customer_names),len(product_names)), len(pairs) - pairs.count(-1))
+            self.assertEqual(len(set(pairs) - set([-1])), len(pairs) - pairs.count(-1))
+            self.assertEqual(expected.match_suitability(expected.match_products()),
+                             matcher.match_suitability(pairs))
+    
+    def test_large_file(self):
+        matcher = class_matcher.ClassMatcher(*_get_names("large.txt", False))
+        self.assertEqual(1489.5, matcher.match_suitability(matcher.match_products()))
+    
+    def test_group_names(self):
+        self.assertEqual([[[0,2],[1],[3]], [0,1,0,2]], class_matcher.group_names([5,4,5,(1,2)]))
+    
+    def test_radical(self):
+        cases = { 0 : 0, 1 : 1, 2 : 2, 8 : 2, 12 : 6, 25 : 5, 23 : 23 }
+        
+        for number, expected in cases.iteritems():
+            self.assertEqual(expected, class_matcher.radical(number))
+    
+    def test_transport(self):
+        flows = class_matcher.transport([2,1], [1,3], [[4,1],[5,3]])
+        self.assertEqual({(0,0) : 1, (0,1) : 1, (1,1) : 1}, flows)
+
+class SparseMatcherSteps(unittest.TestCase):
+    
+    def test_match_suitability(self):
+        cases = ( 11.5, 7, 4.5, 17.5, 20.25, 19.75, 4.5 )
+        
+        for i, expected in enumerate(cases):
+            matcher = sparse_matcher.SparseMatcher(*_get_names(str(i)+'.txt'))
+            pairs = matcher.match_products()
+            self.assertEqual(expected, matcher.match_suitability(pairs))
+    
+    def test_candidate_edges(self):
+        (customer_names, product_names) = _get_names("large.txt", False)
+        (lengths, vowels, consonants) = features.customer_features(customer_names)
+        product_lengths = features.product_features(product_names)
+        
+        edges = sparse_matcher.candidate_edges(lengths, vowels, consonants, product_lengths, 3)
+        
+        degree = [0 for name in product_names]
+        for i, row in enumerate(edges):
+            self.assertTrue(len(row) >= 3)
+            for (j, cost) in row:
+                degree[j] += 1
+                self.assertEqual(-features.scaled_score(lengths[i], vowels[i], consonants[i], product_lengths[j]), cost)
+        
+        self.assertTrue(min(degree) >= 3)
+    
+    def test_dense_fallback(self):
+        # A single candidate per customer cannot match every customer here
+        names = _get_names("multi.txt", False)
+        matcher = sparse_matcher.SparseMatcher(names[0], names[1], 1, retries = 0)
+        pairs = matcher.match_products()
+        
+        self.assertTrue(matcher.used_dense_fallback())
+        self.assertEqual(109.25, matcher.match_suitability(pairs))
+        
+        matcher = sparse_matcher.SparseMatcher(names[0], names[1], 8)
+        self.assertEqual(109.25, matcher.match_suitability(matcher.match_products()))
+        self.assertFalse(matcher.used_dense_fallback())
+    
+    def test_gap(self):
+        # The candidate graph loses little against the exact engine
+        for append in ("large.txt", "multi.txt", "multi.crashF", "multi.diff"):
+            names = _get_names(append, False)
+            exact = jv_matcher.JVMatcher(*names)
+            optimum = exact.match_suitability(exact.match_products())
+            
+            matcher = sparse_matcher.SparseMatcher(*names)
+            suitability = matcher.match_suitability(matcher.match_products())
+            self.assertTrue(0.99 * optimum <= suitability <= optimum)
+    
+    def test_widened_graph(self):
+        # Widening around the failed searches matches everyone without the dense problem
+        (customer_names, product_names) = _get_names("large.txt", False)
+        for shape in ((customer_names, product_names), (customer_names, product_names[:40]),
+                      (customer_names[:40], product_names)):
+            matcher = sparse_matcher.SparseMatcher(shape[0], shape[1], 1)
+            pairs = matcher.match_products()
+            
+            if len(shape[0]) == len(shape[1]):
+                self.assertTrue(matcher.widened() > 0)
+            self.assertFalse(matcher.used_dense_fallback())
+            self.assertEqual(len(shape[0]), len(pairs))
+            self.assertEqual(min(map(len, shape)), len(set(pairs) - set([-1])))
+            self.assertEqual(len(pairs) - pairs.count(-1), len(set(pairs) - set([-1])))
+    
+    def test_sparse_assignment(self):
+        edges = [[(0,-4),(1,-1)], [(0,-5)], [(1,-2),(2,-2)]]
+        self.assertEqual([1,0,2], sparse_matcher.sparse_assignment(edges, 3))
+        
+        edges = [[(0,-4)], [(0,-5)], [(1,-1)]]
+        reached = []
+        self.assertEqual(None, sparse_matcher.sparse_assignment(edges, 3, reached))
+        self.assertEqual([[0, 1], [2]], map(sorted, reached))
+
+class AuctionMatcherSteps(unittest.TestCase):
+    
+    def test_match_suitability(self):
+        cases = ( 11.5, 7, 4.5, 17.5, 20.25, 19.75, 4.5 )
+        
+        for i, expected in enumerate(cases):
+            matcher = auction_matcher.AuctionMatcher(*_get_names(str(i)+'.txt'))
+            pairs = matcher.match_products()
+            self.assertEqual(expected, matcher.match_suitability(pairs))
+    
+    def test_large_file(self):
+        for processes in (1, 2):
+            matcher = auction_matcher.AuctionMatcher(*_get_names("large.txt", False), processes = processes)
+            self.assertEqual(1489.5, matcher.match_suitability(matcher.match_products()))
+    
+    def test_auction(self):
+        # Against every permutation of small random matrices
+        generator = random.Random(14)
+        for i in range(100):
+            size = generator.randint(1, 6)
+            benefits = [[generator.randint(-5, 9) for col in range(size)] for row in range(size)]
+            best = max(sum(benefits[row][perm[row]] for row in range(size))
+                       for perm in itertools.permutations(range(size)))
+            
+            result = auction_matcher.auction(benefits)
+            self.assertEqual(range(size), sorted(result))
+            self.assertEqual(best, sum(benefits[row][col] for row, col in enumerate(result)))
+    
+    def test_parallel_auction(self):
+        # Every round is split over the workers
+        generator = random.Random(15)
+        benefits = [[generator.randint(0, 30) for col in range(40)] for row in range(40)]
+        
+        serial = auction_matcher.auction(benefits)
+        parallel = auction_matcher.auction(benefits, 2, 1)
+        self.assertEqual(range(40), sorted(parallel))
+        self.assertEqual(sum(benefits[row][col] for row, col in enumerate(serial)),
+                         sum(benefits[row][col] for row, col in enumerate(parallel)))
+    
+    def test_small_parallel_auction(self):
+        # No round of a small problem reaches the workers, so none are started
+        values = [[1, 2], [3, 4]]
+        self.assertFalse(isinstance(auction_matcher._make_bidder(values, 4, 3), auction_matcher._SharedBidder))
+        
+        bidder = auction_matcher._make_bidder(values, 2, 2)
+        try:
+            self.assertTrue(isinstance(bidder, auction_matcher._SharedBidder))
+        finally:
+            bidder.close()
+
+class RectangularMatcherSteps(unittest.TestCase):
+    
+    def test_match_suitability(self):
+        cases = ( 11.5, 7, 4.5, 17.5, 20.25, 19.75, 4.5 )
+        
+        for i, expected in enumerate(cases):
+            matcher = rectangular_matcher.RectangularMatcher(*_get_names(str(i)+'.txt'))
+            pairs = matcher.match_products()
+            self.assertEqual(expected, matcher.match_suitability(pairs))
+    
+    def test_large_file(self):
+        matcher = rectangular_matcher.RectangularMatcher(*_get_names("large.txt", False))
+        self.assertEqual(1489.5, matcher.match_suitability(matcher.match_products()))
+    
+    def test_shapes(self):
+        # Tall and wide lists give the totals of the padded engine, with every
+        # product used once and the customers left over unmatched
+        (customer_names, product_names) = _get_names("multi.crashF", False)
+        for shape in ((customer_names * 4, product_names[:5]), (customer_names[:3], product_names * 2)):
+            matcher = rectangular_matcher.RectangularMatcher(*shape)
+            pairs = matcher.match_products()
+            expected = jv_matcher.JVMatcher(*shape)
+            
+            self.assertEqual(len(shape[0]), len(pairs))
+            self.assertEqual(min(map(len, shape)), len(pairs) - pairs.count(-1))
+            self.assertEqual(len(set(pairs) - set([-1])), len(pairs) - pairs.count(-1))
+            self.assertEqual(expected.match_suitability(expected.match_products()),
+                             matcher.match_suitability(pairs))
+            
+            self.assertEqual(matcher._transposed, len(shape[0]) > len(shape[1]))
+            self.assertEqual(min(map(len, shape)), len(matcher._cost))
+
+class ImplicitMatcherSteps(unittest.TestCase):
+    
+    def test_match_suitability(self):
+        cases = ( 11.5, 7, 4.5, 17.5, 20.25, 19.75, 4.5 )
+        
+        for i, expected in enumerate(cases):
+            matcher = implicit_matcher.ImplicitMatcher(*_get_names(str(i)+'.txt'))
+            pairs = matcher.match_products()
+            self.assertEqual(expected, matcher.match_suitability(pairs))
+    
+    def test_large_file(self):
+        matcher = implicit_matcher.ImplicitMatcher(*_get_names("large.txt", False))
+        self.assertEqual(1489.5, matcher.match_suitability(matcher.match_products()))
+    
+    def test_same_costs(self):
+        # Rows computed on demand match the matrix RectangularMatcher stores,
+        # in both orientations and with empty names
+        (customer_names, product_names) = _get_names("multi.crashF", False)
+        for shape in ((customer_names * 3 + [""], product_names[:5] + [""]),
+                      (customer_names[:3] + [""], product_names * 2)):
+            stored = rectangular_matcher.RectangularMatcher(*shape)
+            stored._setup_matcher()
+            implicit = implicit_matcher.ImplicitMatcher(*shape)
+            implicit._setup_matcher()
+            
+            self.assertEqual(len(stored._cost), len(implicit._cost))
+            self.assertEqual(stored._cost, [implicit._cost[row] for row in range(len(implicit._cost))])
+            self.assertEqual(stored.match_products(), implicit.match_products())
+
+class GreedyMatcherSteps(unittest.TestCase):
+    
+    def test_match_suitability(self):
+        # The small cases are solved exactly, and the bound proves it
+        cases = ( 11.5, 7, 4.5, 17.5, 20.25, 19.75, 4.5 )
+        
+        for i, expected in enumerate(cases):
+            matcher = greedy_matcher.GreedyMatcher(*_get_names(str(i)+'.txt'))
+            pairs = matcher.match_products()
+            self.assertEqual(expected, matcher.match_suitability(pairs))
+            self.assertEqual(expected, matcher.upper_bound())
+            self.assertEqual(0, matcher.gap(pairs))
+    
+    def test_bounds(self):
+        for append in ("large.txt", "multi.txt", "multi.crashF", "multi.diff"):
+            names = _get_names(append, False)
+            exact = jv_matcher.JVMatcher(*names)
+            optimum = exact.match_suitability(exact.match_products())
+            
+            matcher = greedy_matcher.GreedyMatcher(*names)
+            pairs = matcher.match_products()
+            self.assertTrue(matcher.match_suitability(pairs) <= optimum <= matcher.upper_bound())
+            
+            greedy_only = greedy_matcher.GreedyMatcher(*names, passes = 0)
+            self.assertTrue(greedy_only.match_suitability(greedy_only.match_products()) <=
+                            matcher.match_suitability(pairs))
+    
+    def test_bound_first(self):
+        # The bound is the same whether or not the matching was asked for first
+        for append in ("large.txt", "multi.txt", "multi.crashF", "multi.diff"):
+            names = _get_names(append, False)
+            matched = greedy_matcher.GreedyMatcher(*names)
+            matched.match_products()
+            
+            self.assertEqual(matched.upper_bound(), greedy_matcher.GreedyMatcher(*names).upper_bound())
+        
+        self.assertEqual(0.0, greedy_matcher.GreedyMatcher([], ["Widget"]).upper_bound())
+    
+    def test_shapes(self):
+        (customer_names, product_names) = _get_names("multi.crashF", False)
+        for shape in ((customer_names * 4, product_names[:5]), (customer_names[:3], product_names * 2)):
+            matcher = greedy_matcher.GreedyMatcher(*shape)
+            pairs = matcher.match_products()
+            exact = jv_matcher.JVMatcher(*shape)
+            optimum = exact.match_suitability(exact.match_products())
+            
+            self.assertEqual(len(shape[0]), len(pairs))
+            self.assertEqual(min(map(len, shape)), len(pairs) - pairs.count(-1))
+            self.assertEqual(len(set(pairs) - set([-1])), len(pairs) - pairs.count(-1))
+            self.assertTrue(matcher.match_suitability(pairs) <= optimum <= matcher.upper_bound())
+
+class FeatureFunctions(unittest.TestCase):
+    
+    def test_name_features(self):
+        cases = {
+                 "Henry James" : (11,3,7),
+                 "A n o" : (5,2,1),
+                 "" : (0,0,0)
+                 }
+        
+        for name, expected in cases.iteritems():
+            self.assertEqual(expected, features.name_features(name))
+    
+    def test_suitability_matrix(self):
+        # Must agree with Customer.get_suitability cell by cell
+        for append in ("3.txt", "multi.crashF", "large.txt"):
+            (customer_names, product_names) = _get_names(append, False)
+            customer_names.append("")
+            product_names.append("")
+            
+            expected = [[names.Customer(customer).get_suitability(names.Product(product)) \
+                         for product in product_names] for customer in customer_names]
+            
+            self.assertEqual(expected, features.suitability_matrix(customer_names, product_names))
+    
+    def test_scaled_suitability_matrix(self):
+        # Scaled scores are exact integers names.SCALE times the suitability
+        (customer_names, product_names) = _get_names("multi.crashF", False)
+        scaled = features.scaled_suitability_matrix(customer_names, product_names)
+        
+        for scaled_row, row in zip(scaled, features.suitability_matrix(customer_names, product_names)):
+            self.assertTrue(all(type(score) in (int, long) for score in scaled_row))
+            self.assertEqual(row, [score / float(names.SCALE) for score in scaled_row])
+
 class NameClasses(unittest.TestCase):
     
     def test_get_factors(self):
@@ -0,0 +1,67 @@
+#!/usr/bin/env python2.6
+'''Tests the length pair branch table
+
+Created on Oct 18, 2026
+'''
+import length_table #@UnresolvedImport
+from milo_imperative import names #@UnresolvedImport
+
+from fractions import gcd
+import unittest
+
+class LengthTable(unittest.TestCase):
+
+    def test_gcd_branch(self):
+        # Every pair must agree with fractions.gcd, lengths of 0 included
+        length_table.ensure(150)
+        for length in range(151):
+            row = length_table.gcd_branch_row(length)
+            for product_length in range(151):
+                expected = product_length % 2 + 2 * (gcd(length, product_length) > 1)
+                self.assertEqual(expected, row[product_length])
+    
+    def test_branch(self):
+        # Every pair must agree with the factor sets of names.Name
+        length_table.ensure(99)
+        factors = [names.Name("x" * length).get_factors() for length in range(100)]
+        for length in range(100):
+            row = length_table.branch_row(length)
+            for product_length in range(100):
+                common = names.Name("x" * length).has_common_factor(factors[product_length])
+                self.assertEqual(product_length % 2 + 2 * common, row[product_length])
+                self.assertEqual(common, length_table.common_factor(length, product_length))
+    
+    def test_growth(self):
+        # Lookups beyond the table grow it, up to MAX_SIZE
+        size = length_table._table[0]
+        self.assertEqual(length_table.ODD_COMMON, length_table.branch(3, 3 * (2 * size + 1)))
+        self.assertEqual(length_table.EVEN, length_table.gcd_branch(size * 4 + 1, 2))
+        self.assertTrue(length_table._table[0] > min(3 * (2 * size + 1), length_table.MAX_SIZE - 1))
+        self.assertTrue(length_table._table[0] <= length_table.MAX_SIZE)
+    
+    def test_beyond_table(self):
+        # Lengths past MAX_SIZE are worked out directly, and do not grow the table
+        long_length = 15 * length_table.MAX_SIZE + 3
+        length_table.ensure(long_length)
+        self.assertEqual(length_table.MAX_SIZE, length_table._table[0])
+        
+        lengths = [0, 1, 2, 3, 5, 9, 10, long_length, long_length + 2, 3 * long_length]
+        for length in lengths:
+            row = length_table.branch_row(length)
+            gcd_row = length_table.gcd_branch_row(length)
+            for product_length in lengths:
+                common = names.Name("x" * length).has_common_factor(names.Name("x" * product_length).get_factors())
+                expected = product_length % 2 + 2 * (gcd(length, product_length) > 1)
+                self.assertEqual(product_length % 2 + 2 * common, length_table.branch(length, product_length))
+                self.assertEqual(expected, length_table.gcd_branch(length, product_length))
+                if product_length < length_table.MAX_SIZE:
+                    self.assertEqual(product_length % 2 + 2 * common, row[product_length])
+                    self.assertEqual(expected, gcd_row[product_length])
+            
+            self.assertEqual([length_table.branch(length, product_length) for product_length in lengths],
+                             length_table.branch_values(range(4), length, lengths))
+            self.assertEqual([length_table.gcd_branch(length, product_length) for product_length in lengths],
+                             length_table.branch_values(range(4), length, lengths, by_gcd = True))
+
+if __name__ == '__main__':
+    unittest.main()
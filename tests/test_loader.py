@@ -0,0 +1,55 @@
+#!/usr/bin/env python2.6
+'''Tests the streaming name loader used by main
+
+Created on Oct 18, 2026
+'''
+import loader #@UnresolvedImport
+from milo_imperative import features #@UnresolvedImport
+
+import unittest
+import tempfile
+import os
+
+CASE_PATH= "./cases/"
+
+class Loader(unittest.TestCase):
+
+    def test_read_names(self):
+        # Must split exactly like the old read().replace().split() did
+        for name in ("customers-0.txt", "products-3.txt", "customers-large.txt", "products-multi.crashF"):
+            expected = open(CASE_PATH+name).read().replace("\r","").split('\n')
+            self.assertEqual(expected, loader.read_names(CASE_PATH+name))
+
+    def test_line_endings(self):
+        cases = {
+                 "" : [""],
+                 "\n" : ["",""],
+                 "a\r\nb\r\n" : ["a","b",""],
+                 "a\rb\nc" : ["ab","c"],
+                 "one" : ["one"]
+                 }
+
+        for contents, expected in cases.iteritems():
+            (handle, path) = tempfile.mkstemp()
+            try:
+                os.write(handle, contents)
+                os.close(handle)
+                self.assertEqual(expected, loader.read_names(path))
+            finally:
+                os.remove(path)
+
+    def test_read_features(self):
+        path = CASE_PATH+"customers-multi.crashF"
+        names = loader.read_names(path)
+
+        (lengths, vowels, consonants) = loader.read_features(path)
+        self.assertEqual(map(features.name_features, names), zip(lengths, vowels, consonants))
+
+    def test_select_names(self):
+        path = CASE_PATH+"products-3.txt"
+        names = loader.read_names(path)
+
+        self.assertEqual({0 : names[0], 2 : names[2]}, loader.select_names(path, [2,-1,0,2]))
+
+if __name__ == '__main__':
+    unittest.main()
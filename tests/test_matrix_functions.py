@@ -28,6 +28,16 @@ class MatrixFunctions(unittest.TestCase):
         for input in cases:
             self.assertEqual(input[1], matrix_functions.augment_matrix(input[0]))
     
+    def test_scale_matrix(self):
+        cases = (
+                 ([[1.25,2],[0.5,0]], [[5,8],[2,0]]),
+                 ([[20.25]], [[81]]),
+                 )
+
+        for input in cases:
+            self.assertEqual(input[1], matrix_functions.scale_matrix(input[0], 4))
+            self.assertTrue(all(type(item) is int for row in matrix_functions.scale_matrix(input[0], 4) for item in row))
+
     def test_min_matrix(self):
         cases = (
                  ([[1,2],[3,4]], [[3,2],[1,0]]),
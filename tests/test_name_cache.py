@@ -0,0 +1,74 @@
+#!/usr/bin/env python2.6
+'''Tests the process-wide name feature cache
+
+Created on Oct 18, 2026
+'''
+import name_cache #@UnresolvedImport
+from milo_imperative import names #@UnresolvedImport
+from milo_imperative import features #@UnresolvedImport
+from milo_functional import names as functional_names #@UnresolvedImport
+
+import unittest
+
+class NameCache(unittest.TestCase):
+
+    def setUp(self):
+        name_cache.clear_cache()
+    
+    def tearDown(self):
+        name_cache.set_max_size(name_cache.MAX_SIZE)
+        name_cache.clear_cache()
+    
+    def test_name_features(self):
+        cases = (
+                 ("", (0, frozenset(), 0, 0)),
+                 ("a", (1, frozenset(), 1, 0)),
+                 ("Bob Smith", (9, frozenset([3, 9]), 2, 6)),
+                 (u"Ann-Marie 12", (12, frozenset([2, 3, 4, 6, 12]), 4, 4))
+                 )
+        
+        for name, expected in cases:
+            self.assertEqual(expected, name_cache.name_features(name))
+            self.assertEqual(expected, name_cache.compute_features(name))
+    
+    def test_length_factors(self):
+        # Must match the divisors found by trial division
+        for number in range(0, 200):
+            self.assertEqual(set(i for i in range(2, number + 1) if number % i == 0),
+                             name_cache.length_factors(number))
+    
+    def test_shared(self):
+        # Both packages read the same cache entries
+        names.Customer("Jane Doe")
+        names.Product("Jane Doe")
+        functional_names.name_features("Jane Doe")
+        
+        stats = name_cache.cache_stats()
+        self.assertEqual((1, 3, 1), (stats["misses"], stats["hits"], stats["size"]))
+    
+    def test_bulk_features(self):
+        # Whole lists of names are not kept in the cache
+        self.assertEqual([[8, 3], [4, 1], [3, 2]], features.customer_features(["Jane Doe", "Bob"]))
+        self.assertEqual(0, name_cache.cache_stats()["size"])
+    
+    def test_eviction(self):
+        name_cache.set_max_size(2)
+        
+        for name in ("a", "bb", "a", "ccc", "bb", "a"):
+            name_cache.name_features(name)
+        
+        # "bb" is dropped for "ccc" as "a" was used after it, then "a" and "ccc" in turn
+        self.assertEqual({"hits" : 1, "misses" : 5, "evictions" : 3, "size" : 2, "max_size" : 2},
+                         name_cache.cache_stats())
+        
+        name_cache.set_max_size(1)
+        self.assertEqual(1, len(name_cache._cache))
+        self.assertEqual(4, name_cache.cache_stats()["evictions"])
+        
+        # Without room nothing is kept
+        name_cache.set_max_size(0)
+        self.assertEqual((1, frozenset(), 1, 0), name_cache.name_features("a"))
+        self.assertEqual(0, name_cache.cache_stats()["size"])
+
+if __name__ == '__main__':
+    unittest.main()
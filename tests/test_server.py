@@ -0,0 +1,113 @@
+#!/usr/bin/env python2.6
+'''Tests the matching server
+
+Created on Oct 18, 2026
+'''
+import server #@UnresolvedImport
+import batch #@UnresolvedImport
+
+import unittest
+import threading
+import urllib2
+import json
+
+CASE_PATH= "./cases/"
+
+class Server(unittest.TestCase):
+
+    def setUp(self):
+        self.service = server.MatchService(2, batch_wait = 0.2)
+        self.server = server.MatchServer(("127.0.0.1", 0), self.service)
+        self.url = "http://127.0.0.1:%d" % self.server.server_address[1]
+        
+        self.thread = threading.Thread(target = self.server.serve_forever)
+        self.thread.start()
+    
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        self.service.close()
+    
+    def test_match(self):
+        jobs = [(open(CASE_PATH+"customers-"+str(i)+".txt").read().replace("\r","").split("\n")[:-1],
+                 open(CASE_PATH+"products-"+str(i)+".txt").read().replace("\r","").split("\n")[:-1])
+                 for i in range(7)]
+        
+        replies = [None for job in jobs]
+        def post(index):
+            replies[index] = self._request("/match", {"customers" : jobs[index][0], 
+                                                      "products" : jobs[index][1]})
+        
+        # Concurrent requests are solved together
+        threads = [threading.Thread(target = post, args = (i,)) for i in range(len(jobs))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        for (customer_names, product_names), (status, reply) in zip(jobs, replies):
+            self.assertEqual(200, status)
+            self.assertEqual(batch.solve_names(customer_names, product_names, "jv"),
+                             [reply["pairs"], reply["suitability"]])
+        
+        # The second run of the same names hits the warm caches
+        (status, reply) = self._request("/match", {"customers" : jobs[3][0], "products" : jobs[3][1], 
+                                                   "mode" : "imperative"})
+        self.assertEqual([0,2,1,3], reply["pairs"])
+        
+        (status, metrics) = self._request("/metrics")
+        self.assertEqual((8, 0), (metrics["requests"], metrics["errors"]))
+        self.assertTrue(metrics["batches"] < 8)
+        self.assertTrue(metrics["name_cache"]["hits"] > 0)
+        self.assertTrue(metrics["latency_ms"]["max"] >= metrics["latency_ms"]["p50"] > 0)
+    
+    def test_errors(self):
+        self.assertEqual((200, {"status" : "ok"}), self._request("/health"))
+        self.assertEqual(404, self._request("/other")[0])
+        
+        (status, reply) = self._request("/match", {"customers" : ["a"], "products" : ["b"], "mode" : "none"})
+        self.assertEqual((400, "unknown mode u'none'"), (status, reply["error"]))
+        
+        self.assertEqual(400, self._request("/match", {"customers" : ["a"]})[0])
+        self.assertEqual(400, self._request("/match", {"customers" : "a", "products" : ["b"]})[0])
+        
+        # A failed solve is reported and counted
+        (status, reply) = self._request("/match", {"customers" : [], "products" : ["b"]})
+        self.assertEqual(400, status)
+        self.assertEqual(1, self._request("/metrics")[1]["errors"])
+    
+    def test_limits(self):
+        # Oversized requests are refused before they reach a worker
+        (status, reply) = self._request("/match", {"customers" : ["a"] * (server.MAX_NAMES + 1), "products" : ["b"]})
+        self.assertEqual(400, status)
+        self.assertTrue("at most %d names" % server.MAX_NAMES in reply["error"])
+        
+        (status, reply) = self._request("/match", {"customers" : ["a" * (server.MAX_NAME_LENGTH + 1)], "products" : ["b"]})
+        self.assertEqual(400, status)
+        
+        self.server.max_body = 100
+        (status, reply) = self._request("/match", {"customers" : ["a" * 50], "products" : ["b" * 50]})
+        self.assertEqual(413, status)
+        self.assertEqual(0, self._request("/metrics")[1]["batches"])
+    
+    def test_timeout(self):
+        # A request whose task never comes back times out instead of hanging
+        self.service._timeout = 0.2
+        self.service._submit = lambda requests: None
+        
+        (status, reply) = self._request("/match", {"customers" : ["a"], "products" : ["b"]})
+        self.assertEqual((504, "no result within 0.2 seconds"), (status, reply["error"]))
+        self.assertEqual(1, self._request("/metrics")[1]["errors"])
+    
+    def _request(self, path, body = None):
+        if body is not None:
+            body = json.dumps(body)
+        try:
+            reply = urllib2.urlopen(self.url + path, body, 30)
+            return (reply.getcode(), json.loads(reply.read()))
+        except urllib2.HTTPError, error:
+            return (error.code, json.loads(error.read()))
+
+if __name__ == '__main__':
+    unittest.main()